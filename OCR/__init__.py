@@ -1,2 +1,5 @@
 from .ocr import OCR
 from .flag import ScanFlags
+from .backend import get_backend, OCRBackend
+from .cache import cached_image_to_data, cached_image_to_string, ScanCache
+from .margins import MarginFilter
@@ -0,0 +1,217 @@
+import ctypes
+import ctypes.util
+import threading
+
+import numpy
+from PIL import Image
+
+from utils.status import info, warn
+
+_LIBRARY_NAMES = ('tesseract', 'libtesseract.so.5', 'libtesseract.so.4', 'libtesseract-5', 'libtesseract.5.dylib')
+
+_local = threading.local()
+_fallback_reported = threading.Event()
+
+
+class OCRBackend:
+    """
+    A text recognition engine.
+
+    Accepts PIL images or numpy arrays in OpenCV's layout (greyscale, BGR, BGRA).
+    """
+
+    name: str = 'none'
+
+    def image_to_string(self, image: Image.Image | numpy.ndarray, psm: int = 3, dpi: int | None = None) -> str:
+        raise NotImplementedError
+
+    def image_to_data(self, image: Image.Image | numpy.ndarray, psm: int = 3, dpi: int | None = None) -> str:
+        """ tesseract's TSV output: one row per page, block, paragraph, line and word, with its box """
+
+        raise NotImplementedError
+
+    def close(self) -> None:
+        return
+
+
+class PytesseractBackend(OCRBackend):
+    """ Forks the tesseract binary per image; always available, slowest. """
+
+    name = 'pytesseract'
+
+    def image_to_string(self, image: Image.Image | numpy.ndarray, psm: int = 3, dpi: int | None = None) -> str:
+        import pytesseract  # only needed when libtesseract isn't available
+
+        if isinstance(image, numpy.ndarray):
+            image = Image.fromarray(_to_rgb(image))
+
+        config = f"--psm {psm} --dpi {dpi}" if dpi else f"--psm {psm}"
+
+        return pytesseract.image_to_string(image=image, config=config)
+
+    def image_to_data(self, image: Image.Image | numpy.ndarray, psm: int = 3, dpi: int | None = None) -> str:
+        import pytesseract
+
+        if isinstance(image, numpy.ndarray):
+            image = Image.fromarray(_to_rgb(image))
+
+        config = f"--psm {psm} --dpi {dpi}" if dpi else f"--psm {psm}"
+
+        return pytesseract.image_to_data(image=image, config=config)
+
+
+class TesseractAPIBackend(OCRBackend):
+    """
+    Drives libtesseract through its C API.
+
+    The language model is loaded once when the engine is created and reused for every image,
+    and pixel buffers are handed over directly, so there is no temp file or process per page.
+    """
+
+    name = 'tesseract-api'
+
+    def __init__(self, lang: str = 'eng', datapath: str | None = None) -> None:
+        self.handle = None
+        self.lib = _load_library()
+        self.handle = self.lib.TessBaseAPICreate()
+
+        if self.lib.TessBaseAPIInit3(self.handle, datapath.encode() if datapath else None, lang.encode()) != 0:
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+            raise RuntimeError(f"libtesseract could not load language '{lang}'.")
+
+        return
+
+    def image_to_string(self, image: Image.Image | numpy.ndarray, psm: int = 3, dpi: int | None = None) -> str:
+        return self._recognise(image, psm, dpi, self.lib.TessBaseAPIGetUTF8Text)
+
+    def image_to_data(self, image: Image.Image | numpy.ndarray, psm: int = 3, dpi: int | None = None) -> str:
+        # pytesseract's header row, so both backends produce the same TSV
+        header = 'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n'
+
+        return header + self._recognise(image, psm, dpi, lambda handle: self.lib.TessBaseAPIGetTSVText(handle, 0))
+
+    def _recognise(self, image: Image.Image | numpy.ndarray, psm: int, dpi: int | None, output) -> str:
+        """ hand the pixels to the engine and return what output(handle) produces, freeing the engine's copy """
+
+        if not dpi and isinstance(image, Image.Image) and image.info.get('dpi'):
+            dpi = image.info['dpi'][0]
+
+        pixels = _to_buffer(image)
+        height, width = pixels.shape[:2]
+        depth = 1 if pixels.ndim == 2 else pixels.shape[2]
+
+        self.lib.TessBaseAPISetPageSegMode(self.handle, psm)
+        self.lib.TessBaseAPISetImage(
+            self.handle, pixels.ctypes.data_as(ctypes.c_void_p), width, height, depth, pixels.strides[0]
+        )
+        if dpi:
+            self.lib.TessBaseAPISetSourceResolution(self.handle, int(dpi))
+
+        text_ptr = output(self.handle)
+        try:
+            text = ctypes.string_at(text_ptr).decode('utf-8') if text_ptr else ''
+        finally:
+            self.lib.TessDeleteText(text_ptr)
+            self.lib.TessBaseAPIClear(self.handle)
+
+        return text
+
+    def close(self) -> None:
+        if self.handle:
+            self.lib.TessBaseAPIEnd(self.handle)
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+
+        return
+
+    def __del__(self):
+        self.close()
+
+
+def get_backend() -> OCRBackend:
+    """
+    Return this thread's long-lived OCR engine, creating it on first use.
+
+    libtesseract is preferred; pytesseract is the fallback when the library cannot be loaded.
+    Engines are not thread-safe, so every thread (and every pool worker) gets its own.
+    """
+
+    backend = getattr(_local, 'backend', None)
+
+    if backend is None:
+        try:
+            backend = TesseractAPIBackend()
+        except (OSError, RuntimeError, AttributeError) as e:
+            if not _fallback_reported.is_set():
+                _fallback_reported.set()
+                warn(e)
+                info("Falling back to pytesseract.")
+            backend = PytesseractBackend()
+
+        _local.backend = backend
+
+    return backend
+
+
+def _load_library() -> ctypes.CDLL:
+    for name in _LIBRARY_NAMES:
+        path = ctypes.util.find_library(name) if name == 'tesseract' else name
+
+        if not path:
+            continue
+
+        try:
+            lib = ctypes.CDLL(path)
+        except OSError:
+            continue
+
+        _declare(lib)
+        return lib
+
+    raise OSError("libtesseract not found.")
+
+
+def _declare(lib: ctypes.CDLL) -> None:
+    handle = ctypes.c_void_p
+
+    lib.TessBaseAPICreate.restype = handle
+    lib.TessBaseAPIInit3.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+    lib.TessBaseAPIInit3.restype = ctypes.c_int
+    lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+    lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.TessBaseAPISetSourceResolution.argtypes = [handle, ctypes.c_int]
+    lib.TessBaseAPIGetUTF8Text.argtypes = [handle]
+    lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+    lib.TessBaseAPIGetTSVText.argtypes = [handle, ctypes.c_int]
+    lib.TessBaseAPIGetTSVText.restype = ctypes.c_void_p
+    lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIClear.argtypes = [handle]
+    lib.TessBaseAPIEnd.argtypes = [handle]
+    lib.TessBaseAPIDelete.argtypes = [handle]
+
+    return
+
+
+def _to_rgb(pixels: numpy.ndarray) -> numpy.ndarray:
+    """ OpenCV arrays are BGR(A); tesseract and PIL expect RGB(A) """
+
+    if pixels.ndim == 3 and pixels.shape[2] in (3, 4):
+        order = [2, 1, 0] if pixels.shape[2] == 3 else [2, 1, 0, 3]
+        pixels = pixels[:, :, order]
+
+    return pixels
+
+
+def _to_buffer(image: Image.Image | numpy.ndarray) -> numpy.ndarray:
+    if isinstance(image, Image.Image):
+        if image.mode not in ('L', 'RGB', 'RGBA'):
+            image = image.convert('L' if image.mode in ('1', 'I', 'I;16', 'F') else 'RGB')
+        pixels = numpy.asarray(image)
+    else:
+        pixels = _to_rgb(image)
+
+    if pixels.dtype == numpy.bool_:
+        pixels = pixels.astype(numpy.uint8) * 255
+
+    return numpy.ascontiguousarray(pixels, dtype=numpy.uint8)
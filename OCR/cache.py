@@ -0,0 +1,195 @@
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy
+from PIL import Image
+
+from utils.status import warn
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+SCAN_CACHE_DIR = Path(PROJECT_DIR, 'cache', 'ocr')
+
+DEFAULT_CACHE_BYTES: int = 256 * 1024 * 1024
+
+
+class ScanCache:
+    """
+    On-disk cache of OCR results, content-addressed by page pixels and OCR settings.
+
+    The same page scanned with the same settings is only sent to tesseract once, across runs.
+    Once the cache grows past max_bytes, the least recently used entries are evicted.
+    Entries are written atomically, so pool workers can share one cache directory; each worker keeps its own
+    ScanCache and hands its counts back with record(). A ScanCache is safe to share between threads.
+    """
+
+    def __init__(self, directory: Path = SCAN_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+
+        return
+
+    @staticmethod
+    def key(image: Image.Image | numpy.ndarray, settings: str) -> str:
+        digest = hashlib.sha256(settings.encode())
+
+        if isinstance(image, Image.Image):
+            digest.update(f"{image.mode}{image.size}".encode())
+            digest.update(image.tobytes())
+        else:
+            pixels = numpy.ascontiguousarray(image)
+            digest.update(f"{pixels.dtype}{pixels.shape}".encode())
+            digest.update(pixels.data)
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)  # mark as recently used
+        except OSError:
+            self.record(misses=1)
+            return None
+
+        self.record(hits=1)
+
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        path = self._path(key)
+
+        try:
+            os.makedirs(path.parent, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp, path)
+        except OSError as e:
+            warn(e)
+            return
+
+        with self._lock:
+            if self.size is None:
+                self.size = sum(size for _, _, size in self._entries())
+            else:
+                self.size += len(text.encode('utf-8'))
+
+            if self.size > self.max_bytes:
+                self._evict()
+
+        return
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict()
+
+        return
+
+    def record(self, hits: int = 0, misses: int = 0) -> None:
+        """ count lookups, including those a pool worker made against its own ScanCache """
+
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+        return
+
+    def _evict(self) -> None:
+        """ delete least recently used entries until the cache is back under 90% of max_bytes """
+
+        entries = sorted(self._entries())
+        self.size = sum(size for _, _, size in entries)
+
+        for _, path, size in entries:
+            if self.size <= self.max_bytes * 0.9:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            self.size -= size
+
+        return
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.1%} hit rate)"
+
+    def _path(self, key: str) -> Path:
+        return Path(self.directory, key[:2], f"{key}.txt")
+
+    def _entries(self) -> list[tuple[float, Path, int]]:
+        entries = list()
+
+        if not os.path.isdir(self.directory):
+            return entries
+
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.txt'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, Path(entry.path), stat.st_size))
+
+        return entries
+
+
+def cached_image_to_string(
+        backend,
+        image: Image.Image | numpy.ndarray,
+        psm: int = 3,
+        dpi: int | None = None,
+        cache: ScanCache | None = None
+) -> str:
+    """ backend.image_to_string, answered from the cache when these pixels were scanned with these settings before """
+
+    if cache is None:
+        return backend.image_to_string(image, psm, dpi)
+
+    key = cache.key(image, f"lang=eng;psm={psm};dpi={dpi}")
+    text = cache.get(key)
+
+    if text is None:
+        text = backend.image_to_string(image, psm, dpi)
+        cache.put(key, text)
+
+    return text
+
+
+def cached_image_to_data(
+        backend,
+        image: Image.Image | numpy.ndarray,
+        psm: int = 3,
+        dpi: int | None = None,
+        cache: ScanCache | None = None
+) -> str:
+    """ backend.image_to_data, the TSV of words and their boxes, answered from the cache like cached_image_to_string """
+
+    if cache is None:
+        return backend.image_to_data(image, psm, dpi)
+
+    key = cache.key(image, f"lang=eng;psm={psm};dpi={dpi};output=tsv")
+    data = cache.get(key)
+
+    if data is None:
+        data = backend.image_to_data(image, psm, dpi)
+        cache.put(key, data)
+
+    return data
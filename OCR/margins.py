@@ -0,0 +1,192 @@
+import re
+import threading
+from collections import Counter
+from statistics import median
+
+MARGIN_BAND: float = 0.1  # share of the page height at the top and bottom where headers and folios are looked for
+MAX_HEADER_WORDS: int = 8
+MAX_FOLIO: int = 999  # highest arabic page number: a number of four digits on its own line is far more often a year
+
+_ARABIC_FOLIO = re.compile(r'^[\[(\-–—.]*(\d+)[\])\-–—.]*$')
+# front matter is numbered in lowercase roman numerals, and rarely runs past c: 'I', 'Mi' or 'mix' are words
+_ROMAN_FOLIO = re.compile(r'^[\[(\-–—.]*(?=[ivxlc])c{0,3}(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})[\])\-–—.]*$')
+_LETTERS = re.compile(r'[^a-zA-Z]')
+
+
+class Word:
+    def __init__(self, text: str, left: int, top: int, width: int, height: int) -> None:
+        self.text = text
+        self.left = left
+        self.top = top
+        self.right = left + width
+        self.bottom = top + height
+
+        return
+
+
+class Line:
+    """ The words tesseract placed on one line, with the paragraph they belong to and their combined box. """
+
+    def __init__(self, paragraph: tuple[int, int], words: list[Word]) -> None:
+        self.paragraph = paragraph
+        self.words = words
+        self.left = min(word.left for word in words)
+        self.top = min(word.top for word in words)
+        self.right = max(word.right for word in words)
+        self.bottom = max(word.bottom for word in words)
+
+        return
+
+    @property
+    def height(self) -> int:
+        return self.bottom - self.top
+
+    @property
+    def text(self) -> str:
+        return ' '.join(word.text for word in self.words)
+
+
+def parse_tsv(tsv: str) -> tuple[int, int, list[Line]]:
+    """ (page width, page height, lines in reading order) from tesseract's TSV output """
+
+    lines: dict[tuple[int, int, int], list[Word]]
+
+    width = height = 0
+    lines = dict()
+
+    for row in tsv.splitlines()[1:]:
+        fields = row.split('\t')
+
+        if len(fields) < 12:
+            continue
+
+        level, _, block, paragraph, line, _, left, top, w, h = map(int, fields[:10])
+        text = fields[11].strip()
+
+        if level == 1:
+            width, height = w, h
+        elif level == 5 and text:
+            lines.setdefault((block, paragraph, line), list()).append(Word(text, left, top, w, h))
+
+    return width, height, [Line(key[:2], words) for key, words in lines.items()]
+
+
+def is_arabic_folio(text: str) -> bool:
+    match = _ARABIC_FOLIO.match(text)
+    return match is not None and 1 <= int(match.group(1)) <= MAX_FOLIO
+
+
+def layout_text(lines: list[Line]) -> str:
+    """ lines laid out the way tesseract's plain text output is: a blank line between paragraphs """
+
+    paragraphs: list[list[str]]
+
+    paragraphs = list()
+    previous = None
+
+    for line in lines:
+        if line.paragraph != previous:
+            paragraphs.append(list())
+            previous = line.paragraph
+
+        paragraphs[-1].append(line.text)
+
+    return '\n\n'.join('\n'.join(paragraph) for paragraph in paragraphs) + '\n' if paragraphs else ''
+
+
+class MarginFilter:
+    """
+    Drop running headers and folios (page numbers) from scanned pages, using the word boxes of the page's own scan.
+
+    A line is a candidate when it is the first or last line of the page, lies within MARGIN_BAND of the page's
+    top or bottom edge, and stands at least a line's height apart from the body text. A candidate is confirmed as
+    - a folio if it is the only word on the line, at the top or the bottom of the page, and is an arabic number
+      from 1 to MAX_FOLIO or a lowercase roman numeral;
+    - a header if it is the top candidate, is short, and the same words, bar an arabic folio at either end, have
+      already been a top candidate on another page of the document: running headers repeat, chapter headings don't.
+
+    The first page a running header appears on keeps it, as that can't be told from a heading.
+    One filter is kept per document so headers seen on earlier pages are recognised; it is thread-safe.
+    """
+
+    def __init__(self, headers: bool = True, folios: bool = True) -> None:
+        self.headers = headers
+        self.folios = folios
+
+        self.seen: Counter[str] = Counter()
+        self.removed = 0
+
+        self._lock = threading.Lock()
+
+        return
+
+    def strip(self, tsv: str) -> str:
+        """ the page's text from its TSV, without the lines confirmed as headers or folios """
+
+        width, height, lines = parse_tsv(tsv)
+
+        if len(lines) < 2 or not height:
+            return layout_text(lines)
+
+        margins = self.find_margins(lines, height)
+
+        return layout_text([line for line in lines if line not in margins])
+
+    def find_margins(self, lines: list[Line], height: int) -> list[Line]:
+        by_position = sorted(lines, key=lambda line: line.top)
+        spacing = median(line.height for line in lines)
+        margins = list()
+
+        first, second = by_position[0], by_position[1]
+        if first.top <= height * MARGIN_BAND and second.top - first.bottom >= spacing:
+            if self.is_folio(first) or self.is_header(first):
+                margins.append(first)
+
+        # body text can end a page after a paragraph gap, so only page numbers are taken from the bottom
+        last, before = by_position[-1], by_position[-2]
+        if last.bottom >= height * (1 - MARGIN_BAND) and last.top - before.bottom >= spacing and last is not first:
+            if self.is_folio(last):
+                margins.append(last)
+
+        return margins
+
+    def is_folio(self, line: Line) -> bool:
+        if not self.folios or len(line.words) != 1:
+            return False
+
+        text = line.words[0].text
+
+        if not is_arabic_folio(text) and not _ROMAN_FOLIO.match(text):
+            return False
+
+        with self._lock:
+            self.removed += 1
+
+        return True
+
+    def is_header(self, line: Line) -> bool:
+        words = [word.text for word in line.words]
+
+        if not self.headers:
+            return False
+
+        # a folio printed on the same line as the header doesn't make it any less of a header;
+        # a roman numeral there is as likely to be part of the title, as in 'Chapter II'
+        if len(words) > 1 and is_arabic_folio(words[0]):
+            words = words[1:]
+        elif len(words) > 1 and is_arabic_folio(words[-1]):
+            words = words[:-1]
+
+        letters = _LETTERS.sub('', ''.join(words)).lower()
+
+        if not letters or len(words) > MAX_HEADER_WORDS:
+            return False
+
+        with self._lock:
+            repeated = self.seen[letters] > 0
+            self.seen[letters] += 1
+
+            if repeated:
+                self.removed += 1
+
+        return repeated
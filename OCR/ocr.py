@@ -1,29 +1,105 @@
+import os
 import re
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
+from typing import Callable, Iterable
 
-import pytesseract as tesseract
-from PIL import Image
+from numpy import ndarray
 
+from segment.page_format import open_page
 from utils.status import good, info, progress, warn
 
+from .backend import get_backend, OCRBackend
+from .cache import cached_image_to_data, cached_image_to_string, ScanCache
 from .flag import ScanFlags
+from .margins import MarginFilter
+
+
+_worker_cache: ScanCache | None = None
+
+
+def _init_worker(cache: tuple[Path, int] | None = None) -> None:
+    global _worker_cache
+
+    # tesseract's OpenMP threads would otherwise fight the pool for cores
+    # see: https://tesseract-ocr.github.io/tessdoc/FAQ#can-i-increase-speed-of-ocr
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+    # one cache per worker for the life of the pool: its size is only counted once, not on every page
+    _worker_cache = ScanCache(*cache) if cache else None
+
+
+def _scan_worker_page(page: Path | ndarray, psm: int, dpi: int | None, data: bool) -> tuple[str, int, int]:
+    """ _scan_page in a pool worker, with the hits and misses it made on the worker's cache """
+
+    hits, misses = (_worker_cache.hits, _worker_cache.misses) if _worker_cache else (0, 0)
+    text = _scan_page(page, psm, dpi, _worker_cache, data)
+
+    if _worker_cache:
+        return text, _worker_cache.hits - hits, _worker_cache.misses - misses
+
+    return text, 0, 0
+
+
+def _scan_page(
+        page: Path | ndarray, psm: int, dpi: int | None = None, cache: ScanCache | None = None, data: bool = False
+) -> str:
+    """ the page's text, or with data its TSV of words and boxes """
+
+    scan = cached_image_to_data if data else cached_image_to_string
+
+    if isinstance(page, ndarray):
+        return scan(get_backend(), page, psm, dpi, cache)
+
+    image = open_page(page)
+
+    if isinstance(image, ndarray):
+        return scan(get_backend(), image, psm, dpi, cache)
+
+    with image:
+        return scan(get_backend(), image, psm, dpi, cache)
 
 
 class OCR:
-    def __init__(self, files: list[Path], flags: ScanFlags, psm: int = 3):
+    def __init__(
+            self,
+            files: Iterable[Path | ndarray],
+            flags: ScanFlags,
+            psm: int = 3,
+            worker_count: int = 1,
+            backend: OCRBackend | None = None,
+            page_count: int | None = None,
+            dpi: int | None = None,
+            cache: ScanCache | None = None,
+            on_text: Callable[[int, str], None] | None = None,
+            margins: MarginFilter | None = None
+    ):
+        """
+        files may be image paths or decoded page buffers, and may be a lazy iterable (pass page_count for progress),
+        in which case pages are pulled one at a time and only a few are held in memory.
+        With a cache, pages already scanned with the same settings are not sent to tesseract again.
+        on_text is called with (index, text) as each page is scanned, before any post-processing.
+        With margins, pages are scanned with their word boxes, which margins uses to drop headers and folios.
+        """
+
         super().__init__()
 
         self.files = files
         self.flags = flags
 
-        self.tesseract = tesseract
+        self.backend = backend
         self.psm = psm
+        self.dpi = dpi
+        self.cache = cache
+        self.on_text = on_text
+        self.margins = margins
+        self.worker_count = max(1, worker_count)
 
         self.start_time = None
         self.end_time = None
 
-        self.file_count = len(files)
+        self.file_count = page_count if page_count is not None else len(files)
         self.scanned_texts = list()
 
         self.scan()
@@ -43,38 +119,122 @@ class OCR:
         info("Scanning.")
         self.start_time = time.time()
 
+        if self.worker_count > 1 and self.file_count > 1:
+            self.scan_parallel()
+        else:
+            self.scan_serial()
+
+        self.end_time = time.time()
+        good(f"Scanned in {(self.end_time - self.start_time):.2f} seconds.\n")
+
+        if self.cache:
+            info(f"Scan cache: {self.cache.stats()}")
+
+        return
+
+    def scan_serial(self):
+        backend = self.backend or get_backend()
+
         for i, file in enumerate(self.files):
-            try:
-                image = Image.open(file)
-            except FileNotFoundError as e:
-                warn(e)
-                info(f"Cannot find '{str(file)}'.")
-                return
+            if isinstance(file, ndarray):
+                image = file
+            else:
+                try:
+                    image = open_page(file)
+                except FileNotFoundError as e:
+                    warn(e)
+                    info(f"Cannot find '{str(file)}'.")
+                    return
+
+            if self.margins:
+                text = self.margins.strip(cached_image_to_data(backend, image, self.psm, self.dpi, self.cache))
+            else:
+                text = cached_image_to_string(backend, image, self.psm, self.dpi, self.cache)
 
-            text = self.tesseract.image_to_string(image=image, config=f"--psm {self.psm}")
             self.scanned_texts.append(text)
 
+            if self.on_text:
+                self.on_text(i, text)
+
             progress(
                 text=f"Pages scanned: {i + 1} of {self.file_count}.",
                 end='' if i + 1 < self.file_count else '\r'
             )
 
-        self.end_time = time.time()
-        good(f"Scanned in {(self.end_time - self.start_time):.2f} seconds.\n")
+        return
+
+    def scan_parallel(self):
+        """
+        fan pages out over a process pool, one single-threaded tesseract per worker
+
+        At most two pages per worker are in flight, so a lazy iterable of page buffers is never drained into memory.
+        """
+
+        texts: dict[int, str]
+        pending: dict[Future, int]
+
+        if isinstance(self.files, list):
+            missing = [file for file in self.files if isinstance(file, Path) and not os.path.exists(file)]
+            if missing:
+                info(f"Cannot find '{str(missing[0])}'.")
+                return
+
+        texts = dict()
+        pending = dict()
+
+        def collect(futures) -> None:
+            for future in futures:
+                i = pending.pop(future)
+                text, hits, misses = future.result()
+                texts[i] = self.margins.strip(text) if self.margins else text
+
+                if self.cache:
+                    self.cache.record(hits, misses)
+
+                if self.on_text:
+                    self.on_text(i, texts[i])
+
+                progress(
+                    text=f"Pages scanned: {len(texts)} of {self.file_count}.",
+                    end='' if len(texts) < self.file_count else '\r'
+                )
+
+        cache = (self.cache.directory, self.cache.max_bytes) if self.cache else None
+
+        with ProcessPoolExecutor(
+                max_workers=self.worker_count, initializer=_init_worker, initargs=(cache,)
+        ) as executor:
+            for i, page in enumerate(self.files):
+                future = executor.submit(_scan_worker_page, page, self.psm, self.dpi, self.margins is not None)
+                pending[future] = i
+
+                if len(pending) >= self.worker_count * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            collect(list(pending))
+
+        self.scanned_texts.extend(texts[i] for i in sorted(texts))
 
         return
 
     def post_process(self):
-        texts = self.split_page(self.scanned_texts)
-        texts = self.fix_hyphenation(texts)
-        texts = self.fix_newlines(texts)
-        texts = self.fix_pre_punctuation_space(texts)
-        texts = self.fix_post_punctuation_space(texts)
-
-        self.scanned_texts = texts
+        self.scanned_texts = self.clean(self.scanned_texts)
 
         return
 
+    @classmethod
+    def clean(cls, texts: list[str]) -> list[str]:
+        """ split scanned pages into paragraphs and tidy them; pages are independent, so this also works per page """
+
+        texts = cls.split_page(texts)
+        texts = cls.fix_hyphenation(texts)
+        texts = cls.fix_newlines(texts)
+        texts = cls.fix_pre_punctuation_space(texts)
+        texts = cls.fix_post_punctuation_space(texts)
+
+        return texts
+
     def get_text(self) -> list[str]:
         return self.scanned_texts
 
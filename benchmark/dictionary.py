@@ -0,0 +1,75 @@
+"""
+Benchmark Spellchecker cold start.
+
+Compares the legacy path (bundle every loaded .txt dictionary, then build the SymSpell index from text)
+against loading the compiled dictionary cache.
+
+Usage: python -m benchmark.dictionary [--repeat 5]
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+from statistics import median
+
+import SymSpellCppPy
+
+from spellcheck import Spellchecker
+from spellcheck.bundle import bundle_dictionaries
+from spellcheck.core import DICTIONARY_DIR
+from utils.status import good, info
+from utils.system import delete
+
+
+def legacy_start() -> None:
+    dictionaries = [Path(DICTIONARY_DIR, item) for item in os.listdir(DICTIONARY_DIR) if item.endswith('.txt')]
+    std_dict = [item for item in dictionaries if 'bigram' not in item.name]
+
+    symspell = SymSpellCppPy.SymSpell()
+    bundle = bundle_dictionaries(std_dict)
+    symspell.load_dictionary(corpus=str(bundle), term_index=0, count_index=1, separator=' ')
+    delete(bundle)
+
+    return
+
+
+def cached_start() -> None:
+    with Spellchecker():
+        pass
+
+    return
+
+
+def time_runs(func, repeat: int) -> float:
+    timings = list()
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    info("Compiling dictionary cache.")
+    cached_start()
+
+    legacy = time_runs(legacy_start, args.repeat)
+    good(f"Bundle and load (legacy): {legacy * 1000:.1f} ms.")
+
+    cached = time_runs(cached_start, args.repeat)
+    good(f"Compiled cache:           {cached * 1000:.1f} ms.")
+
+    info(f"Speedup: {legacy / cached:.2f}x.")
+
+    return
+
+
+if __name__ == '__main__':
+    main()
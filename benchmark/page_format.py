@@ -0,0 +1,154 @@
+"""
+Benchmark the formats page images can be stored in between rendering, preprocessing and OCR.
+
+Writes every page in each segment.page_format.PageFormat and reports the time to encode and decode a page, its
+size on disk, how far the decoded pixels are from the original (mean grey level error, and the share of pixels
+that land on the other side of an Otsu threshold, i.e. glyph edges that moved), and, if tesseract is installed,
+OCR accuracy: the share of the page's words recognised.
+
+Without FILEs, synthetic 200 dpi pages of known text are generated, and accuracy is measured against that text;
+with FILEs, against tesseract's reading of the original page.
+
+Usage: python -m benchmark.page_format [PAGE.png ...] [--pages 5] [--repeat 3] [--noise 6]
+"""
+
+import argparse
+import difflib
+import os
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from segment.page_format import binarise, PageFormat, read_page, to_gray, write_page
+from segment.render import DEFAULT_DPI
+from utils.status import good, info, warn
+
+WORDS = (
+    "the of and to in is was that for on with as by at from his her which this be are had not but were an "
+    "all their one been have they has would there more when who into will its them than some other time could "
+    "harbour lighthouse November weather northerly against ordinary quarrelled parliament Belfast keyboard"
+).split()
+
+
+def make_page(seed: int, noise: float) -> tuple[np.ndarray, str]:
+    """ a US letter page at 200 dpi of random words in a 12 pt-ish font, with scanner noise, and its text """
+
+    rng = np.random.default_rng(seed)
+    page = Image.new('L', (1700, 2200), 250)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=34)
+    lines = list()
+
+    for row in range(45):
+        line = ' '.join(rng.choice(WORDS, int(rng.integers(6, 10))))
+        draw.text((170, 180 + row * 42), line, fill=25, font=font)
+        lines.append(line)
+
+    pixels = np.asarray(page, np.int16) + rng.normal(0, noise, (2200, 1700))
+
+    return cv2.cvtColor(np.clip(pixels, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR), '\n'.join(lines)
+
+
+def recognise(image: np.ndarray) -> str | None:
+    """ tesseract's reading of a page, or None if tesseract isn't available """
+
+    try:
+        import pytesseract
+        return pytesseract.image_to_string(Image.fromarray(to_gray(image)), config=f'--psm 3 --dpi {DEFAULT_DPI}')
+    except Exception:
+        return None
+
+
+def word_accuracy(text: str, reference: str) -> float:
+    matcher = difflib.SequenceMatcher(None, reference.split(), text.split(), autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / max(1, len(reference.split()))
+
+
+def measure(
+        page_format: PageFormat, pages: list[np.ndarray], references: list[str | None], repeat: int
+) -> dict[str, float | None]:
+    encode = list()
+    decode = list()
+    sizes = list()
+    grey_errors = list()
+    flipped = list()
+    accuracy = list()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, page in enumerate(pages):
+            path = Path(directory, f"page-{i}{page_format.suffix}")
+            decoded = None
+
+            for _ in range(repeat):
+                start = time.perf_counter()
+                write_page(path, page)
+                encode.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                decoded = read_page(path)
+                decode.append(time.perf_counter() - start)
+
+            sizes.append(os.path.getsize(path))
+
+            original = to_gray(page).astype(np.int16)
+            grey_errors.append(np.abs(to_gray(decoded).astype(np.int16) - original).mean())
+            flipped.append(np.count_nonzero(binarise(decoded) != binarise(page)) / original.size)
+
+            if references[i] is not None:
+                accuracy.append(word_accuracy(recognise(decoded) or '', references[i]))
+
+    return {
+        'encode': mean(encode),
+        'decode': mean(decode),
+        'size': mean(sizes),
+        'grey_error': mean(grey_errors),
+        'flipped': mean(flipped),
+        'accuracy': mean(accuracy) if accuracy else None
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', type=Path, nargs='*')
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--noise', type=float, default=6, help="grey levels of scanner noise, 0 for a born-digital page"
+    )
+    args = parser.parse_args()
+
+    if args.images:
+        pages = [cv2.imread(str(path)) for path in args.images]
+        references = [recognise(page) for page in pages]
+    else:
+        info(f"Generating {args.pages} synthetic pages.")
+        pages, references = map(list, zip(*(make_page(seed, args.noise) for seed in range(args.pages))))
+
+        if recognise(pages[0]) is None:
+            references = [None] * len(pages)
+
+    if all(reference is None for reference in references):
+        warn("tesseract is not available, OCR accuracy is not measured.")
+
+    info(f"Storing {len(pages)} pages of {pages[0].shape[1]}x{pages[0].shape[0]}.")
+
+    for page_format in PageFormat:
+        result = measure(page_format, pages, references, args.repeat)
+        accuracy = f"{result['accuracy'] * 100:5.1f}% of words" if result['accuracy'] is not None else "n/a"
+
+        good(
+            f"{page_format.name:<5} encode {result['encode'] * 1000:6.1f} ms, decode {result['decode'] * 1000:6.1f} ms, "
+            f"{result['size'] / 1024:7.1f} KiB/page, grey error {result['grey_error']:5.2f}, "
+            f"{result['flipped'] * 100:.3f}% pixels across the threshold, OCR {accuracy}."
+        )
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark progress reporting while a .pdf is rasterised.
+
+Compares the old busy-wait loop, which polled the render threads and called progress() as fast as it could,
+against Segment.segment, which sleeps on a condition variable until a page is finished. Reports wall time,
+CPU time used by this process (poppler runs in processes of its own, so this is almost all reporting
+overhead), and how many progress updates were sent to the sink.
+
+Without FILE a synthetic document of --pages pages is generated.
+
+Usage: python -m benchmark.progress [FILE.pdf] [--pages 300] [--repeat 3]
+"""
+
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from statistics import median
+
+from PIL import Image, ImageDraw
+
+from segment.pdf import Segment, SEGMENT_WORKERS
+from segment.render import page_runs
+from utils.status import good, info, progress, set_progress_sink
+
+
+def make_pdf(path: Path, page_count: int) -> None:
+    """ an A4 document at 100 dpi with a block of text-like lines on every page """
+
+    pages = list()
+
+    for number in range(page_count):
+        page = Image.new('L', (827, 1169), 255)
+        draw = ImageDraw.Draw(page)
+
+        for line in range(40):
+            draw.rectangle((80, 100 + line * 24, 740 - (line * 37 + number) % 200, 112 + line * 24), fill=0)
+
+        pages.append(page)
+
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=100)
+
+    return
+
+
+def busy_wait(pdf: Segment) -> None:
+    """ the loop Segment.segment used before: poll the threads, reporting progress on every pass """
+
+    pages = pdf.pending_pages()
+    runs = page_runs(pages, SEGMENT_WORKERS)
+
+    threads = [threading.Thread(target=pdf.thread_segment, args=run) for run in runs]
+
+    for thread in threads:
+        thread.start()
+
+    while len(pdf.rendered) < len(pages) and any(thread.is_alive() for thread in threads):
+        progress(
+            text=f"Pages converted: {len(pdf.rendered)} of {len(pages)}.",
+            end='' if len(pdf.rendered) < len(pages) - 1 else '\r'
+        )
+
+    for thread in threads:
+        thread.join()
+
+    return
+
+
+def condition(pdf: Segment) -> None:
+    pdf.segment()
+
+    return
+
+
+def time_run(func, source: Path) -> tuple[float, float, int]:
+    """ (wall seconds, process CPU seconds, progress updates) for one render of source """
+
+    updates = 0
+
+    def count(_: str) -> None:
+        nonlocal updates
+        updates += 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        pdf_path = Path(directory, source.name)
+        shutil.copy(source, pdf_path)
+
+        # in_memory stops the constructor rendering; keep_intermediates still creates the image directory
+        pdf = Segment(pdf_path, in_memory=True, keep_intermediates=True)
+
+        set_progress_sink(count)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        try:
+            func(pdf)
+        finally:
+            set_progress_sink(None)
+
+        return time.perf_counter() - wall, time.process_time() - cpu, updates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', type=Path, nargs='?')
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = args.pdf
+
+        if source is None:
+            source = Path(directory, 'synthetic.pdf')
+            info(f"Generating a {args.pages} page document.")
+            make_pdf(source, args.pages)
+
+        for name, func in (('Busy-wait', busy_wait), ('Condition', condition)):
+            runs = [time_run(func, source) for _ in range(args.repeat)]
+            wall = median(run[0] for run in runs)
+            cpu = median(run[1] for run in runs)
+            updates = median(run[2] for run in runs)
+
+            good(f"{name:<10} {wall:6.2f} s wall, {cpu:6.2f} s CPU in this process, {updates:.0f} progress updates.")
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark rasterising a .pdf in colour, grayscale and monochrome.
+
+Streams every page from poppler in each colour mode and reports the time to render and decode a page, the bytes
+rasterised per page, and the time ImageProcessing takes to find the text region of the pages it gets, since every
+later stage works on whatever poppler produced.
+
+Without FILE a synthetic document of --pages pages is generated.
+
+Usage: python -m benchmark.render [FILE.pdf] [--pages 20] [--dpi 200] [--repeat 3]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+
+import pdf2image as pdf2img
+
+from benchmark.progress import make_pdf
+from preprocess.helper import ImgManipFlags
+from preprocess.image_manipulation import ImageProcessing
+from segment.render import COLOURS, DEFAULT_DPI, stream_pages
+from utils.status import good, info
+
+
+def time_colour(pdf: Path, page_count: int, dpi: int, colour: str, repeat: int) -> tuple[float, float, float]:
+    """ (median render seconds per page, bytes per page, median layout analysis seconds per page) """
+
+    processing = ImageProcessing([], ImgManipFlags.NoFlags)
+    renders = list()
+    analyses = list()
+    size = 0
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = [image for _, image in stream_pages(pdf, 1, page_count, dpi=dpi, colour=colour)]
+        renders.append((time.perf_counter() - start) / page_count)
+
+        start = time.perf_counter()
+        for page in pages:
+            processing.find_text_region(page)
+        analyses.append((time.perf_counter() - start) / page_count)
+
+        size = sum(page.nbytes for page in pages) / page_count
+
+    return median(renders), size, median(analyses)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', type=Path, nargs='?')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = args.pdf
+
+        if source is None:
+            source = Path(directory, 'synthetic.pdf')
+            info(f"Generating a {args.pages} page document.")
+            make_pdf(source, args.pages)
+
+        page_count = pdf2img.pdfinfo_from_path(str(source))['Pages']
+        info(f"Rasterising {page_count} pages at {args.dpi} dpi.")
+
+        for colour in COLOURS:
+            render, size, analysis = time_colour(source, page_count, args.dpi, colour, args.repeat)
+
+            good(
+                f"{colour:<4} render {render * 1000:6.1f} ms/page, {size / 2 ** 20:5.2f} MiB/page, "
+                f"layout analysis {analysis * 1000:6.1f} ms/page."
+            )
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark clause splitting and restitching on long OCR paragraphs.
+
+Compares the legacy index-walking restitch (a whole-string replace per clause) against the
+span-based tokeniser, and checks both rebuild the same text.
+
+Usage: python -m benchmark.restitch [--words 5000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+from statistics import median
+
+from spellcheck.utils import PUNCTUATION, _should_insert_space, restitch_clauses, tokenise_clauses
+from utils.status import good, info, warn
+
+WORDS = (
+    "the", "council", "of", "Dublin", "met", "on", "Tuesday", "last", "when", "Mr", "O'Brien", "moved",
+    "resolution", "in", "favour", "parliament", "Home", "Rule", "meeting", "adjourned", "tbe", "aud", "wbich"
+)
+
+
+def legacy_prepare(text: str) -> tuple[list[str], list[int]]:
+    indices = []
+    strings = []
+    current_str = []
+
+    for i, char in enumerate(text):
+        if char in PUNCTUATION:
+            clause = "".join(current_str)
+            if clause:
+                strings.append(clause)
+            current_str.clear()
+            indices.append(i)
+        else:
+            current_str.append(char)
+
+    if current_str:
+        strings.append("".join(current_str))
+
+    return strings, indices
+
+
+def legacy_restitch(text: list[str], indices: list[int], original_text: str) -> str:
+    length = len(original_text)
+    modified_text = original_text
+    i = 0
+
+    while text:
+        if i >= len(modified_text):
+            break
+
+        if modified_text[i] in PUNCTUATION:
+            if indices and i == indices[0]:
+                indices.remove(indices[0])
+            i += 1
+        else:
+            sliced = modified_text[i: indices[0]] if indices else modified_text[i:]
+            modified_text = modified_text.replace(sliced, _should_insert_space(text[0], sliced))
+
+            diff = (length - len(modified_text)) * -1
+            indices = [x + diff for x in indices]
+            length += diff
+            if indices:
+                i = indices[0] + 1
+                indices.remove(indices[0])
+            text.remove(text[0])
+
+    return modified_text
+
+
+def make_paragraph(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    pieces = list()
+
+    for _ in range(words):
+        pieces.append(rng.choice(WORDS))
+        if rng.random() < 0.12:
+            pieces[-1] += rng.choice(",.;:")
+
+    return " ".join(pieces)
+
+
+def correct(clauses: list[str]) -> list[str]:
+    """ stand-in for lookup_compound: fixes the common OCR confusions, strips surrounding space like SymSpell """
+
+    return [clause.strip().replace("tbe", "the").replace("aud", "and").replace("wbich", "which") for clause in clauses]
+
+
+def run_legacy(paragraph: str) -> str:
+    clauses, indices = legacy_prepare(paragraph)
+    return legacy_restitch(correct(clauses), indices, paragraph)
+
+
+def run_spans(paragraph: str) -> str:
+    clauses, spans = tokenise_clauses(paragraph)
+    return restitch_clauses(correct(clauses), spans, paragraph)
+
+
+def time_runs(func, paragraph: str, repeat: int) -> float:
+    timings = list()
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(paragraph)
+        timings.append(time.perf_counter() - start)
+
+    return median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for words in (args.words // 10, args.words):
+        paragraph = make_paragraph(words)
+        info(f"Paragraph of {words} words ({len(paragraph)} characters).")
+
+        legacy = time_runs(run_legacy, paragraph, args.repeat)
+        good(f"Legacy restitch: {legacy * 1000:.2f} ms.")
+
+        spans = time_runs(run_spans, paragraph, args.repeat)
+        good(f"Span restitch:   {spans * 1000:.2f} ms.")
+
+        info(f"Speedup: {legacy / spans:.1f}x.")
+
+        if run_legacy(paragraph) != run_spans(paragraph):
+            warn("Outputs differ: the legacy whole-string replace rewrote a repeated clause.")
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark .pdf rasterisation.
+
+Compares the legacy path (one pdf2image call, and one poppler launch, per page) against
+the single-pass renderer (one pdftoppm call per contiguous page range).
+
+Usage: python -m benchmark.segment FILE.pdf [--workers 4]
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pdf2image as pdf2img
+
+from segment.render import page_ranges, render_pages
+from utils.status import good, info
+
+
+def legacy_segment(pdf: Path, page_count: int, workers: int, output_dir: Path) -> None:
+    def worker(begin: int, end: int) -> None:
+        for page in range(begin, end + 1):
+            image = pdf2img.convert_from_path(pdf_path=pdf, timeout=20, first_page=page, last_page=page + 1)
+            image[0].save(Path(output_dir, f"{page}.jpg"), 'JPEG')
+
+    threads = [threading.Thread(target=worker, args=pages) for pages in page_ranges(page_count, workers)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return
+
+
+def single_pass_segment(pdf: Path, page_count: int, workers: int, output_dir: Path) -> None:
+    threads = [
+        threading.Thread(target=render_pages, args=(pdf, begin, end, output_dir))
+        for begin, end in page_ranges(page_count, workers)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return
+
+
+def time_run(func, pdf: Path, page_count: int, workers: int) -> float:
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        func(pdf, page_count, workers, Path(output_dir))
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', type=Path)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    page_count = pdf2img.pdfinfo_from_path(str(args.pdf))['Pages']
+    info(f"Rasterising {page_count} pages with {args.workers} workers.")
+
+    legacy = time_run(legacy_segment, args.pdf, page_count, args.workers)
+    good(f"Per-page (legacy): {legacy:.2f} seconds, {legacy / page_count * 1000:.1f} ms/page.")
+
+    single = time_run(single_pass_segment, args.pdf, page_count, args.workers)
+    good(f"Single-pass:       {single:.2f} seconds, {single / page_count * 1000:.1f} ms/page.")
+
+    info(f"Speedup: {legacy / single:.2f}x.")
+
+    return
+
+
+if __name__ == '__main__':
+    main()
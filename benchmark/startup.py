@@ -0,0 +1,81 @@
+"""
+Benchmark startup import cost.
+
+Runs each entry point in a fresh interpreter under `python -X importtime` and reports the total import time,
+the wall time of the process, and which heavy dependencies were loaded. 'eager' imports every stage module
+up front, which is what launching cost before stage imports were deferred.
+
+Usage: python -m benchmark.startup [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+from utils.status import good, info
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY = ('cv2', 'numpy', 'PIL', 'pytesseract', 'pdf2image', 'SymSpellCppPy', 'PyQt5')
+
+SCENARIOS = {
+    'gui': 'import interface',
+    'cli': 'import tara.cli',
+    'cli spellcheck': 'import tara.cli, spellcheck',
+    'eager': 'import interface, tara.cli, segment.pdf, preprocess.image_manipulation, OCR, spellcheck',
+}
+
+
+def import_time(code: str) -> tuple[float, float, list[str]]:
+    """ (total import seconds, process wall seconds, heavy modules loaded) for one fresh interpreter """
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - start
+
+    total = 0
+    loaded = set()
+
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line.split('|')
+
+        # only top-level imports: their cumulative time already includes everything they imported
+        if len(name) - len(name.lstrip()) == 1:
+            total += int(cumulative)
+
+        if name.strip() in HEAVY:
+            loaded.add(name.strip())
+
+    return total / 1e6, wall, sorted(loaded)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    info(f"Importing each entry point {args.repeat} times in a fresh interpreter.")
+
+    for name, code in SCENARIOS.items():
+        runs = [import_time(code) for _ in range(args.repeat)]
+        imports = median(run[0] for run in runs)
+        wall = median(run[1] for run in runs)
+        loaded = ', '.join(runs[-1][2]) or 'none'
+
+        good(f"{name:<15} imports {imports * 1000:7.1f} ms, process {wall * 1000:7.1f} ms, heavy: {loaded}.")
+
+    return
+
+
+if __name__ == '__main__':
+    main()
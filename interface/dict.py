@@ -6,6 +6,7 @@ from PyQt5.QtGui import QDesktopServices
 from PyQt5.QtWidgets import QFileDialog, QListWidget, QMainWindow, QMessageBox, QPushButton
 
 from utils.error import error_dispatcher
+from utils.session import default_session
 from utils.system import copy, delete, is_filetype, move
 
 from .util import DictionaryType
@@ -126,6 +127,7 @@ class DictionaryMethods(QMainWindow):
                 filepath = Path(RESOURCES_DIR, path)
                 move(filepath, DICTIONARY_DIR)
 
+        default_session.invalidate()
         self._refresh_lists()
 
         return
@@ -153,6 +155,7 @@ class DictionaryMethods(QMainWindow):
                 filepath = Path(DICTIONARY_DIR, item.text())
                 move(filepath, RESOURCES_DIR, overwrite=True)
 
+        default_session.invalidate()
         self._refresh_lists()
 
         return
@@ -0,0 +1,270 @@
+import queue
+import re
+import threading
+from enum import Enum
+from pathlib import Path
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QHBoxLayout, QHeaderView, QProgressBar, QPushButton, QTableWidget, QTableWidgetItem,
+    QVBoxLayout, QWidget
+)
+
+from utils.error import error_dispatcher
+from utils.exception import JobCancelled
+from utils.handle_file import discern_type_all, discern_type_scan, discern_type_spellcheck, ProcessType
+from utils.session import Session
+from utils.status import set_progress_sink, warn
+
+PROCESSES = {
+    ProcessType.ALL: discern_type_all,
+    ProcessType.SCAN: discern_type_scan,
+    ProcessType.SPELLCHECK: discern_type_spellcheck
+}
+
+_COUNT = re.compile(r'(\d+)\s+(?:of|out of)\s+(\d+)')
+
+
+class JobState(Enum):
+    QUEUED = 'Queued'
+    RUNNING = 'Running'
+    DONE = 'Done'
+    CANCELLED = 'Cancelled'
+    FAILED = 'Failed'
+
+
+class Job:
+    def __init__(self, job_id: int, path: Path, process: ProcessType) -> None:
+        self.id = job_id
+        self.path = path
+        self.process = process
+        self.state = JobState.QUEUED
+
+        return
+
+
+class JobWorker(QThread):
+    """
+    Run queued files one at a time, off the GUI thread.
+
+    Progress and state changes are reported through signals, which Qt delivers on the GUI thread.
+    Jobs share one Session, so dictionaries and the OCR engine stay loaded from one file to the next;
+    each job still fans out over session.worker_count processes.
+    """
+
+    job_added = pyqtSignal(int, str)
+    job_progress = pyqtSignal(int, str)
+    job_state = pyqtSignal(int, str)
+
+    def __init__(self, session: Session) -> None:
+        super().__init__()
+
+        self.session = session
+        self.jobs: dict[int, Job] = dict()
+        self.current = None
+
+        self._last_report = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+        return
+
+    def submit(self, path: Path, process: ProcessType) -> int:
+        with self._lock:
+            job = Job(self._next_id, path, process)
+            self.jobs[job.id] = job
+            self._next_id += 1
+
+        self.job_added.emit(job.id, path.name)
+        self._queue.put(job)
+
+        return job.id
+
+    def cancel(self, job_id: int) -> None:
+        """ a queued job is dropped; a running one stops at its next cancellation check """
+
+        with self._lock:
+            job = self.jobs.get(job_id)
+
+            if job is None:
+                return
+            elif job.state is JobState.RUNNING:
+                self.session.cancel()
+            elif job.state is JobState.QUEUED:
+                self._set_state(job, JobState.CANCELLED)
+
+        return
+
+    def stop(self) -> None:
+        """ cancel every job and wait for the running one to wind down """
+
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+        self._queue.put(None)
+        self.wait()
+
+        return
+
+    def run(self) -> None:
+        set_progress_sink(self._report)
+
+        try:
+            while (job := self._queue.get()) is not None:
+                with self._lock:
+                    if job.state is not JobState.QUEUED:
+                        continue
+
+                    self.session.cancelled.clear()
+                    self.current = job
+                    self._set_state(job, JobState.RUNNING)
+
+                state = self._run_job(job)
+
+                with self._lock:
+                    self.current = None
+                    self._set_state(job, state)
+        finally:
+            set_progress_sink(None)
+
+        return
+
+    def _run_job(self, job: Job) -> JobState:
+        try:
+            PROCESSES[job.process](job.path, self.session)
+        except JobCancelled:
+            return JobState.CANCELLED
+        except Exception as e:
+            warn(e)
+            error_dispatcher.raise_error("Processing Error", f"Failed to process '{job.path.name}'.\n{e}")
+            return JobState.FAILED
+
+        return JobState.DONE
+
+    def _set_state(self, job: Job, state: JobState) -> None:
+        job.state = state
+        self.job_state.emit(job.id, state.value)
+
+        return
+
+    def _report(self, text: str) -> None:
+        job = self.current
+
+        # progress loops may repeat the same line many times over; only changes are worth a signal
+        if job and (job.id, text) != self._last_report:
+            self._last_report = (job.id, text)
+            self.job_progress.emit(job.id, text)
+
+        return
+
+
+class JobView(QWidget):
+    """ One row per submitted file showing its progress, with buttons to cancel jobs and clear finished ones. """
+
+    def __init__(self, worker: JobWorker) -> None:
+        super().__init__()
+
+        self.worker = worker
+
+        self.table = QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(['File', 'Progress'])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        button_cancel = QPushButton()
+        button_cancel.setText("Cancel")
+        button_cancel.clicked.connect(self._cancel_selected)
+
+        button_clear = QPushButton()
+        button_clear.setText("Clear finished")
+        button_clear.clicked.connect(self._clear_finished)
+
+        buttons = QHBoxLayout()
+        buttons.setAlignment(Qt.AlignRight)
+        buttons.addWidget(button_cancel)
+        buttons.addWidget(button_clear)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        worker.job_added.connect(self._add_job)
+        worker.job_progress.connect(self._update_progress)
+        worker.job_state.connect(self._update_state)
+
+        return
+
+    def _add_job(self, job_id: int, name: str) -> None:
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+
+        item = QTableWidgetItem(name)
+        item.setData(Qt.UserRole, job_id)
+        self.table.setItem(row, 0, item)
+
+        bar = QProgressBar()
+        bar.setRange(0, 1)
+        bar.setValue(0)
+        bar.setFormat(JobState.QUEUED.value)
+        self.table.setCellWidget(row, 1, bar)
+
+        return
+
+    def _update_progress(self, job_id: int, text: str) -> None:
+        bar = self._bar(job_id)
+
+        if bar is None:
+            return
+
+        # stage messages read "<what>: <done> of <total>."; without counts keep the last position
+        match = _COUNT.search(text)
+        if match:
+            bar.setRange(0, max(1, int(match.group(2))))
+            bar.setValue(int(match.group(1)))
+
+        bar.setFormat(text)
+
+        return
+
+    def _update_state(self, job_id: int, state: str) -> None:
+        bar = self._bar(job_id)
+
+        if bar is None:
+            return
+
+        if state == JobState.DONE.value:
+            bar.setRange(0, 1)
+            bar.setValue(1)
+
+        bar.setFormat(state)
+
+        return
+
+    def _cancel_selected(self) -> None:
+        for index in self.table.selectionModel().selectedRows():
+            self.worker.cancel(self.table.item(index.row(), 0).data(Qt.UserRole))
+
+        return
+
+    def _clear_finished(self) -> None:
+        finished = (JobState.DONE, JobState.CANCELLED, JobState.FAILED)
+
+        for row in reversed(range(self.table.rowCount())):
+            job = self.worker.jobs.get(self.table.item(row, 0).data(Qt.UserRole))
+
+            if job is None or job.state in finished:
+                self.table.removeRow(row)
+
+        return
+
+    def _bar(self, job_id: int) -> QProgressBar | None:
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).data(Qt.UserRole) == job_id:
+                return self.table.cellWidget(row, 1)
+
+        return None
@@ -3,7 +3,7 @@ from pathlib import Path
 from PyQt5.QtWidgets import QFileDialog, QMainWindow
 
 from utils.error import error_dispatcher
-from utils.handle_file import discern_type_all, discern_type_scan, discern_type_spellcheck
+from utils.handle_file import ProcessType
 from utils.system import filetype_in_directory
 
 from .help import HelpWindow
@@ -32,9 +32,7 @@ class Processes(QMainWindow):
         )
 
         if files:
-            for file in files:
-                path = Path(file)
-                discern_type_all(path)
+            self._queue_files([Path(file) for file in files], ProcessType.ALL)
 
         return
 
@@ -48,9 +46,7 @@ class Processes(QMainWindow):
         )
 
         if files:
-            for file in files:
-                path = Path(file)
-                discern_type_scan(path)
+            self._queue_files([Path(file) for file in files], ProcessType.SCAN)
 
         return
 
@@ -72,9 +68,32 @@ class Processes(QMainWindow):
         )
 
         if files:
-            for file in files:
-                path = Path(file)
-                discern_type_spellcheck(path)
+            self._queue_files([Path(file) for file in files], ProcessType.SPELLCHECK)
+
+        return
+
+    def _queue_files(self, files: list[Path], process: ProcessType) -> None:
+        """ hand files to the background worker and show their progress """
+
+        for file in files:
+            self.worker.submit(file, process)
+
+        self.centralWidget().setCurrentWidget(self.job_view)
+
+        return
+
+    def _queue_all(self, files: list[Path]) -> None:
+        self._queue_files(files, ProcessType.ALL)
+
+        return
+
+    def _queue_scan(self, files: list[Path]) -> None:
+        self._queue_files(files, ProcessType.SCAN)
+
+        return
+
+    def _queue_spellcheck(self, files: list[Path]) -> None:
+        self._queue_files(files, ProcessType.SPELLCHECK)
 
         return
 
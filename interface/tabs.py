@@ -3,6 +3,7 @@ from PyQt5.QtWidgets import (
     QAbstractItemView, QHBoxLayout, QLabel, QListWidget, QMainWindow, QPushButton, QTabWidget, QVBoxLayout, QWidget
 )
 
+from .jobs import JobView
 from .util import DictionaryType, DragNDropAll, DragNDropScan, DragNDropSpell
 
 
@@ -31,6 +32,7 @@ class TopBarTabs(QMainWindow):
         container_quick = DragNDropAll()
         container_quick.setLayout(tab_quick)
         container_quick.setAcceptDrops(True)
+        container_quick.dropped.connect(self._queue_all)
 
         """ Scan Only Tab """
         tab_scan = QVBoxLayout()
@@ -49,6 +51,7 @@ class TopBarTabs(QMainWindow):
 
         container_scan = DragNDropScan()
         container_scan.setLayout(tab_scan)
+        container_scan.dropped.connect(self._queue_scan)
 
         """ Spellchecking Tab """
         tab_spell = QVBoxLayout()
@@ -67,6 +70,7 @@ class TopBarTabs(QMainWindow):
 
         container_spell = DragNDropSpell()
         container_spell.setLayout(tab_spell)
+        container_spell.dropped.connect(self._queue_spellcheck)
 
         """ Dictionary Tab """
         tab_dict = QVBoxLayout()
@@ -134,11 +138,15 @@ class TopBarTabs(QMainWindow):
         container_dict = QWidget()
         container_dict.setLayout(tab_dict)
 
+        """ Jobs Tab """
+        self.job_view = JobView(self.worker)
+
         # Add Tabs to UI
         tabs.addTab(container_quick, "Quick Run")
         tabs.addTab(container_scan, "Scan")
         tabs.addTab(container_spell, "Spellcheck")
         tabs.addTab(container_dict, "Dictionary")
+        tabs.addTab(self.job_view, "Jobs")
 
         self.setCentralWidget(tabs)
 
@@ -1,11 +1,11 @@
 from enum import Enum
 from pathlib import Path
 
+from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtGui import QDragEnterEvent, QDropEvent
 from PyQt5.QtWidgets import QWidget
 
 from utils.error import error_dispatcher
-from utils.handle_file import discern_type_all, discern_type_scan, discern_type_spellcheck
 from utils.system import filetype_in_directory
 
 
@@ -15,6 +15,8 @@ class DictionaryType(Enum):
 
 
 class DragNDropAll(QWidget):
+    dropped = pyqtSignal(list)  # dropped files, as Paths
+
     def __init__(self):
         super().__init__()
         self.setAcceptDrops(True)
@@ -35,10 +37,8 @@ class DragNDropAll(QWidget):
             )
             return
 
-        for url in event.mimeData().urls():
-            file = Path(url.toLocalFile())
-            discern_type_all(file)
-            
+        self.dropped.emit([Path(url.toLocalFile()) for url in event.mimeData().urls()])
+
         return
 
 
@@ -47,18 +47,6 @@ class DragNDropSpell(DragNDropAll):
         super().__init__()
         self.setAcceptDrops(True)
 
-    def dropEvent(self, event: QDropEvent):
-        if not filetype_in_directory(Path('dictionaries'), '.txt'):
-            error_dispatcher.raise_error(
-                'Dictionary not found',
-                "No dictionaries found.\nUse 'Dictionary' tab to load dictionaries."
-            )
-            return
-
-        for url in event.mimeData().urls():
-            file = Path(url.toLocalFile())
-            discern_type_spellcheck(file)
-
 
 class DragNDropScan(DragNDropAll):
     def __init__(self):
@@ -66,6 +54,4 @@ class DragNDropScan(DragNDropAll):
         self.setAcceptDrops(True)
 
     def dropEvent(self, event: QDropEvent):
-        for url in event.mimeData().urls():
-            file = Path(url.toLocalFile())
-            discern_type_scan(file)
+        self.dropped.emit([Path(url.toLocalFile()) for url in event.mimeData().urls()])
@@ -1,14 +1,17 @@
 import os
 from pathlib import Path
 
-from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtCore import QSize, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QCloseEvent
 from PyQt5.QtWidgets import QApplication, QMessageBox
 
 from utils.error import error_dispatcher
+from utils.session import default_session, limit_engine_threads
 from utils.status import info
 from utils.system import DirectoryContents
 
 from .dict import DictionaryMethods
+from .jobs import JobWorker
 from .menu import TopBarMenu
 from .process import Processes
 from .tabs import TopBarTabs
@@ -16,6 +19,7 @@ from .util import DictionaryType
 
 
 class MainWindow(TopBarMenu, TopBarTabs, DictionaryMethods, Processes):
+    error_raised = pyqtSignal(str, str)
 
     def __init__(self, name: str, version: str) -> None:
         super().__init__()
@@ -24,15 +28,26 @@ class MainWindow(TopBarMenu, TopBarTabs, DictionaryMethods, Processes):
         self.setFixedSize(QSize(400, 320))
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
 
+        self.worker = JobWorker(default_session)
+        self.worker.start()
+
         self._create_tabs()
         self._create_menu()
 
-        error_dispatcher.error.connect(self.show_error_message)
+        # errors may be raised on the worker thread; the Qt signal carries them over to the GUI thread
+        self.error_raised.connect(self.show_error_message)
+        error_dispatcher.error.connect(self.error_raised.emit)
 
         return
 
-    @staticmethod
-    def show_error_message(title: str, message: str) -> None:
+    def closeEvent(self, event: QCloseEvent) -> None:
+        self.worker.stop()
+        event.accept()
+
+        return
+
+    @pyqtSlot(str, str)
+    def show_error_message(self, title: str, message: str) -> None:
         err = QMessageBox()
         err.setWindowTitle(title)
         err.setIcon(QMessageBox.Critical)
@@ -57,6 +72,8 @@ class MainWindow(TopBarMenu, TopBarTabs, DictionaryMethods, Processes):
 def interface_init(name: str, version: str) -> None:
     info(f"Launching {name}\tv{version}!")
 
+    limit_engine_threads(default_session.worker_count)
+
     app = QApplication([])
     app.setApplicationName(name)
     app.setApplicationVersion(version)
@@ -64,6 +81,7 @@ def interface_init(name: str, version: str) -> None:
     window = MainWindow(name, version)
     window.show()
     app.exec()
+    default_session.close()
 
     info(f"Closing {name}.")
 
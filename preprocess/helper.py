@@ -3,6 +3,7 @@ from enum import IntFlag
 from pathlib import Path
 from statistics import median
 from sys import exit
+from typing import Sequence
 
 import cv2
 import numpy
@@ -16,13 +17,18 @@ from utils.system import DirectoryContents
 
 class ImgManipFlags(IntFlag):
     NoFlags = 0
-    CropRunningHeader = 1 << 1
-    CropPageNumber = 1 << 2
     ResizeImage = 1 << 3
+    CropTemplate = 1 << 4
 
 
 class BoundingBox:
-    def __init__(self, bounds: tuple[int, ...]):
+    """
+    An (x, y, w, h) rectangle.
+
+    bounds may be a row of an (N, 4) box array from bounding_boxes(), in which case the box is a view onto it.
+    """
+
+    def __init__(self, bounds: tuple[int, ...] | ndarray):
         try:
             if len(bounds) != 4:
                 raise IndexError("bounds must have 4 indices: x, y, w, h.")
@@ -30,12 +36,24 @@ class BoundingBox:
             warn(e)
             exit(1)
 
-        self.x = int(bounds[0])
-        self.y = int(bounds[1])
-        self.w = int(bounds[2])
-        self.h = int(bounds[3])
         self.bounds = bounds
 
+    @property
+    def x(self) -> int:
+        return int(self.bounds[0])
+
+    @property
+    def y(self) -> int:
+        return int(self.bounds[1])
+
+    @property
+    def w(self) -> int:
+        return int(self.bounds[2])
+
+    @property
+    def h(self) -> int:
+        return int(self.bounds[3])
+
     def __iter__(self):
         return iter(self.bounds)
 
@@ -60,6 +78,30 @@ class BoundingBox:
         return self.w * self.h
 
 
+def bounding_boxes(contours: Sequence[ndarray]) -> ndarray:
+    """
+    The bounding rectangle of every contour, as one (N, 4) array of x, y, w, h.
+
+    Matches cv2.boundingRect per contour, but takes the extremes of all contours' points in one pass.
+    """
+
+    lengths: ndarray
+    starts: ndarray
+
+    if not len(contours):
+        return numpy.empty((0, 4), dtype=numpy.int32)
+
+    lengths = numpy.fromiter(map(len, contours), dtype=numpy.intp, count=len(contours))
+    starts = numpy.zeros(len(contours), dtype=numpy.intp)
+    numpy.cumsum(lengths[:-1], out=starts[1:])
+
+    points = numpy.concatenate(contours).reshape(-1, 2)
+    low = numpy.minimum.reduceat(points, starts)
+    high = numpy.maximum.reduceat(points, starts)
+
+    return numpy.hstack((low, high - low + 1)).astype(numpy.int32)
+
+
 def binarise_image(path: Path) -> None:
     image: ndarray
     binary: ndarray
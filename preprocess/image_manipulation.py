@@ -1,16 +1,19 @@
-import re
 import time
 from pathlib import Path
-from typing import Sequence
+from typing import Callable, Sequence
 
 import cv2
 import numpy as np
-import pytesseract as tesseract
 from numpy import ndarray as image
 
-from preprocess.helper import ImgManipFlags, BoundingBox
+from preprocess.helper import bounding_boxes, BoundingBox, ImgManipFlags
+from preprocess.template import CropTemplate, SAMPLE_PAGES
+from segment.page_format import read_page, write_page
 from utils.status import info, good, progress
 
+ANALYSIS_SCALE: int = 2  # layout is found on a copy of the page at 1/ANALYSIS_SCALE of its resolution
+MIN_ANALYSIS_SIZE: int = 250  # pixels along the short side below which a page is analysed at full size
+
 """ if this isn't included there is a fatal import error """
 import os
 import sys
@@ -28,12 +31,26 @@ if sys.platform.startswith("linux") and ci_and_not_headless:
 
 
 class ImageProcessing:
-    def __init__(self, files: list[Path], flags: ImgManipFlags):
+    """
+    Crop pages to their text region.
+
+    With ImgManipFlags.CropTemplate, preprocessing runs in two phases: the first SAMPLE_PAGES pages are analysed
+    in full and a CropTemplate is learned from their regions, then every later page the template fits is cropped
+    with it directly. process() samples pages spread over the whole document; process_image() on a stream of
+    pages samples the first ones.
+    """
+
+    def __init__(self, files: list[Path], flags: ImgManipFlags, analysis_scale: int = ANALYSIS_SCALE):
         self.files = files
         self.images = list()
 
         self.flags = flags
         self.image_count = len(self.files)
+        self.analysis_scale = max(1, analysis_scale)
+
+        self.template = None
+        self.samples: list[tuple[BoundingBox, tuple[int, int]]] = list()
+        self.template_hits = 0
 
         self.start = None
         self.end = None
@@ -46,38 +63,23 @@ class ImageProcessing:
     def __exit__(self, exc_type, exc_val, exc_tb):
         return
 
-    def process(self):
+    def process(self, on_image: Callable[[Path], None] | None = None):
+        """ crop every file in place; on_image is called with each file once it has been written """
+
         assert self.files, "No files in ImageProcessing.files"
 
         info(f"Processing image{'s' if len(self.images) > 1 else ''}.")
         self.start = time.time()
 
-        for i, file in enumerate(self.files):
-            img = cv2.imread(str(file))
-
-            if self.flags & ImgManipFlags.ResizeImage:
-                img = self.resize(img)
-
-            edit_img = self.get_edges(img)
-            contours = self.get_contours(edit_img)
-            bounding = self.get_likely_components(contours)
-
-            if not bounding:
-                progress(
-                    text=f"Images processed: {i + 1}  out of {self.image_count}.",
-                    end='' if i + 1 < self.image_count else '\r'
-                )
-                continue
+        for i, file in enumerate(self.sample_first(self.files)):
+            img = read_page(file)
+            cropped = self.process_image(img)
 
-            if self.flags & ImgManipFlags.CropRunningHeader:
-                bounding = self.crop_running_header(img, bounding)
-            if self.flags & ImgManipFlags.CropPageNumber:
-                bounding = self.crop_page_number(img, bounding)
+            if cropped is not img:
+                self.save_image(file, cropped)
 
-            region = self.get_text_region(bounding)
-
-            img = img[region.y:region.y + region.h, region.x:region.x + region.w]
-            self.save_image(file, img)
+            if on_image:
+                on_image(file)
 
             progress(
                 text=f"Images processed: {i + 1}  out of {self.image_count}.",
@@ -87,108 +89,144 @@ class ImageProcessing:
         self.end = time.time()
         good(f"Image processing complete in {self.end - self.start} seconds.\n")
 
+        if self.template:
+            info(f"Crop template used for {self.template_hits} of {self.image_count} pages.")
+
         return
 
-    @staticmethod
-    def get_edges(img: image) -> image:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        blur = cv2.bilateralFilter(gray, 9, 75, 75)
-        edges = cv2.Canny(blur, 200, 150)
+    def sample_first(self, files: list[Path]) -> list[Path]:
+        """ files reordered so the pages a crop template is learned from, spread evenly over them, come first """
 
-        return edges
+        if not self.flags & ImgManipFlags.CropTemplate or len(files) <= SAMPLE_PAGES:
+            return files
 
-    @staticmethod
-    def get_contours(img: image, draw: bool = False, tuning: int = 15) -> Sequence[image]:
-        _, threshold = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        kernel = np.ones((tuning, tuning), np.uint8)
-        dilate = cv2.dilate(threshold, kernel, iterations=1)
-        contours, _ = cv2.findContours(dilate, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        step = len(files) / SAMPLE_PAGES
+        sampled = {int(i * step) for i in range(SAMPLE_PAGES)}
 
-        if draw:
-            cv2.drawContours(dilate, contours, -1, (255, 255, 255), 2)
+        return [files[i] for i in sorted(sampled)] + [file for i, file in enumerate(files) if i not in sampled]
 
-        return contours
+    def process_image(self, img: image) -> image:
+        """
+        Crop a single decoded page to its text region.
 
-    @staticmethod
-    def get_likely_components(contours: Sequence[image], draw: bool = False, img: image = None) -> list[BoundingBox]:
-        bounding = [BoundingBox(tuple(cv2.boundingRect(contour))) for contour in contours]
-        bounding = [box for box in bounding if not (box.h / box.w > 0.8 and box.size() < 1000)]  # TODO: this was 1000
+        Works on the page buffer directly, so it can be used without reading or writing image files.
+        Returns img unchanged if no text region was found. Running headers and folios are kept:
+        they are recognised from the page's OCR word boxes and dropped from its text, see OCR.MarginFilter.
+        """
 
-        if draw:
-            for bound in bounding:
-                cv2.rectangle(img, (bound.x, bound.y), (bound.x + bound.w, bound.y + bound.h), (255, 255, 255), 2)
+        if self.flags & ImgManipFlags.ResizeImage:
+            img = self.resize(img)
 
-        return bounding
+        if self.template and self.template.fits(img):
+            self.template_hits += 1
+            return self.template.crop(img)
 
-    @staticmethod
-    def crop_running_header(img: image, bounding: list[BoundingBox]) -> list[BoundingBox]:
-        img_height = img.shape[0]
-        img_width = img.shape[1]
-        top_margin = img_height * 0.1  # TODO: make this a configurable value
+        region = self.find_text_region(img)
+
+        if region is None:
+            return img
+
+        if self.flags & ImgManipFlags.CropTemplate and self.template is None:
+            self.learn_template(region, img.shape[:2])
+
+        return img[region.y:region.y + region.h, region.x:region.x + region.w]
 
-        threshold = 0
+    def find_text_region(self, img: image) -> BoundingBox | None:
+        """
+        The page's text region in full-resolution coordinates, or None if it has none.
 
-        sorted_bounding = list(filter(lambda b: b.y < top_margin, bounding))
-        sorted_bounding = sorted(sorted_bounding, key=lambda b: b.y)
+        Edges and contours are found on a copy downscaled by analysis_scale, with the filter, dilation and speck
+        size scaled to match; only a bounding rectangle is wanted, which doesn't need every pixel. The region
+        is scaled back up and grown by one analysis pixel on every side, so rounding never cuts text off.
+        """
 
-        for box in sorted_bounding:
-            if box.y < top_margin and box.h / box.w < 0.3:
-                y1 = max(0, box.y - 3)
-                y2 = min(box.y + box.h + 3, img_height)
-                x1 = max(0, box.x - 3)
-                x2 = min(box.x + box.w + 3, img_width)
+        scale = self.analysis_scale
+        height, width = img.shape[:2]
 
-                aoi = img[y1:y2, x1:x2]
-                is_header: str = tesseract.image_to_string(aoi)
-                is_header = re.sub(r'[^a-zA-Z0-9]', r'', is_header)
+        if min(height, width) // scale < MIN_ANALYSIS_SIZE:
+            scale = 1
 
-                if is_header and is_header.isalpha():
-                    threshold = y2
-                    break
+        small = img if scale == 1 else cv2.resize(
+            img, (width // scale, height // scale), interpolation=cv2.INTER_AREA
+        )
 
-        return [box for box in bounding if box.y > threshold]
+        edit_img = self.get_edges(small, diameter=max(3, 9 // scale))
+        contours = self.get_contours(edit_img, tuning=max(3, 15 // scale))
+        bounding = self.get_likely_components(contours, min_area=1000 / scale ** 2)
+
+        if not len(bounding):
+            return None
+
+        region = self.get_text_region(bounding)
+
+        if scale == 1:
+            return region
+
+        x = max(0, (region.x - 1) * scale)
+        y = max(0, (region.y - 1) * scale)
+        right = min(width, (region.x + region.w + 1) * scale)
+        bottom = min(height, (region.y + region.h + 1) * scale)
+
+        return BoundingBox((x, y, right - x, bottom - y))
+
+    def learn_template(self, region: BoundingBox, shape: tuple[int, int]) -> None:
+        self.samples.append((region, shape))
+
+        if len(self.samples) == SAMPLE_PAGES:
+            regions, shapes = zip(*self.samples)
+            self.template = CropTemplate.learn(list(regions), list(shapes))
+
+            # pages that don't share a layout keep being analysed one by one
+            if self.template is None:
+                self.flags &= ~ImgManipFlags.CropTemplate
+
+        return
+
+    @staticmethod
+    def get_edges(img: image, diameter: int = 9) -> image:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        blur = cv2.bilateralFilter(gray, diameter, 75, 75)
+        edges = cv2.Canny(blur, 200, 150)
+
+        return edges
 
     @staticmethod
-    def crop_page_number(img: image, bounding: list[BoundingBox]) -> list[BoundingBox]:
-        img_height = img.shape[0]
-        img_width = img.shape[1]
-        top_margin = img_height * 0.9  # TODO: make this a configurable value
+    def get_contours(img: image, draw: bool = False, tuning: int = 15) -> Sequence[image]:
+        _, threshold = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        kernel = np.ones((tuning, tuning), np.uint8)
+        dilate = cv2.dilate(threshold, kernel, iterations=1)
+        contours, _ = cv2.findContours(dilate, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+        if draw:
+            cv2.drawContours(dilate, contours, -1, (255, 255, 255), 2)
 
-        threshold = img_height
+        return contours
 
-        sorted_bounding = list(filter(lambda b: b.y > top_margin, bounding))
-        sorted_bounding = sorted(sorted_bounding, key=lambda b: b.y, reverse=True)
+    @staticmethod
+    def get_likely_components(
+            contours: Sequence[image], draw: bool = False, img: image = None, min_area: float = 1000
+    ) -> np.ndarray:
+        """ the (N, 4) x, y, w, h boxes of contours that could be text: small, squarish specks are dropped """
 
-        for box in sorted_bounding:
-            if box.y > top_margin and box.h / box.w > 0.7:
-                y1 = max(0, box.y - 3)
-                y2 = min(box.y + box.h + 3, img_height)
-                x1 = max(0, box.x - 3)
-                x2 = min(box.x + box.w + 3, img_width)
+        bounding = bounding_boxes(contours)
+        x, y, w, h = bounding.T
 
-                aoi = img[y1:y2, x1:x2]
-                is_header: str = tesseract.image_to_string(aoi)
-                is_header = re.sub(r'[^a-zA-Z0-9]', r'', is_header)
+        bounding = bounding[~((h > 0.8 * w) & (w * h < min_area))]  # TODO: this was 1000
 
-                if is_header and is_header.isalpha():
-                    threshold = y2
-                    break
+        if draw:
+            for x, y, w, h in bounding:
+                cv2.rectangle(img, (int(x), int(y)), (int(x + w), int(y + h)), (255, 255, 255), 2)
 
-        return [box for box in bounding if box.y > threshold]
+        return bounding
 
     @staticmethod
-    def get_text_region(bounding: list[BoundingBox]) -> BoundingBox:
-        all_x = [box.x for box in bounding]
-        all_y = [box.y for box in bounding]
-        all_w = [box.w for box in bounding]
-        all_h = [box.h for box in bounding]
+    def get_text_region(bounding: np.ndarray) -> BoundingBox:
+        """ the union of every box in an (N, 4) box array """
 
-        x = min(all_x)
-        y = min(all_y)
-        w = max(x + w for x, w in zip(all_x, all_w))
-        h = max(y + h for y, h in zip(all_y, all_h))
+        x, y = bounding[:, :2].min(axis=0)
+        right, bottom = (bounding[:, :2] + bounding[:, 2:]).max(axis=0)
 
-        return BoundingBox((x, y, w - x, h - y))
+        return BoundingBox((int(x), int(y), int(right - x), int(bottom - y)))
 
     # this method currently makes tesseract less accurate by resizing
     @staticmethod
@@ -208,4 +246,6 @@ class ImageProcessing:
 
     @staticmethod
     def save_image(file: Path, img: image):
-        cv2.imwrite(f"{str(file)}", img)
+        """ write img back in the format file was rendered in """
+
+        write_page(file, img)
@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+from numpy import ndarray
+
+from preprocess.helper import BoundingBox
+
+SAMPLE_PAGES: int = 8  # pages analysed in full before a template is learned
+SHAPE_TOLERANCE: float = 0.02  # relative difference in page size a template still applies to
+SPECK_PIXELS: int = 16  # a blob of ink outside the template this size or smaller is dust, not text (full resolution)
+
+
+class CropTemplate:
+    """
+    A document's text region, learned from the regions found on a sample of its pages.
+
+    Most pages of a book or paper share one layout, so once the template is known a page can be cropped
+    without finding its edges and contours. fits() checks each page first: the page must be the size the
+    template was learned from, and the margin outside the template may hold specks of dust but no glyph,
+    so not even a single word written in the margin is cut off.
+    Pages that fail are analysed in full.
+    """
+
+    def __init__(self, region: BoundingBox, shape: tuple[int, int]) -> None:
+        self.region = region
+        self.shape = shape
+
+        return
+
+    @classmethod
+    def learn(cls, regions: list[BoundingBox], shapes: list[tuple[int, int]]) -> 'CropTemplate | None':
+        """ the region covering every sampled page of the most common size, or None if too few agree on a size """
+
+        shape = max(set(shapes), key=shapes.count)
+        regions = [region for region, page in zip(regions, shapes) if page == shape]
+
+        if len(regions) < max(2, len(shapes) // 2 + 1):
+            return None
+
+        # the union rather than the median: a template narrower than some pages would shave their longest lines
+        left = min(region.x for region in regions)
+        top = min(region.y for region in regions)
+        right = max(region.x + region.w for region in regions)
+        bottom = max(region.y + region.h for region in regions)
+
+        return cls(BoundingBox((left, top, right - left, bottom - top)), shape)
+
+    def fits(self, img: ndarray) -> bool:
+        height, width = img.shape[:2]
+
+        if (abs(height - self.shape[0]) > self.shape[0] * SHAPE_TOLERANCE
+                or abs(width - self.shape[1]) > self.shape[1] * SHAPE_TOLERANCE):
+            return False
+
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+        region = self.region
+        ink[region.y:region.y + region.h, region.x:region.x + region.w] = 0
+
+        if cv2.countNonZero(ink) <= SPECK_PIXELS:
+            return True
+
+        # any blob bigger than a speck is a glyph, however little of the margin it covers
+        x, y, w, h = cv2.boundingRect(ink)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(ink[y:y + h, x:x + w], connectivity=8)
+
+        return not np.any(stats[1:, cv2.CC_STAT_AREA] > SPECK_PIXELS)
+
+    def crop(self, img: ndarray) -> ndarray:
+        region = self.region
+        return img[region.y:region.y + region.h, region.x:region.x + region.w]
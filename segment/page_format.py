@@ -0,0 +1,91 @@
+from enum import Enum
+from pathlib import Path
+
+import cv2
+import numpy
+from PIL import Image
+
+from segment.render import DEFAULT_DPI
+
+
+class PageFormat(Enum):
+    """
+    How page images are stored between rendering, preprocessing and OCR. The value is the file suffix.
+
+    JPEG is lossy and blurs glyph edges every time a page is re-encoded. The others are lossless and grayscale:
+    PNG keeps every grey level, TIFF is binarised (Otsu) to 1 bit and CCITT G4 compressed, the smallest by far,
+    and NPY is the raw pixel array, which costs no encoding at all but the most disk.
+    """
+
+    JPEG = 'jpg'
+    PNG = 'png'
+    TIFF = 'tif'
+    NPY = 'npy'
+
+    @property
+    def suffix(self) -> str:
+        return f".{self.value}"
+
+    @property
+    def grayscale(self) -> bool:
+        return self is not PageFormat.JPEG
+
+    def poppler_option(self, colour: str) -> list[str] | None:
+        """ the pdftoppm options that write this format directly, or None if pages must be converted here """
+
+        if self is PageFormat.JPEG and colour != 'mono':
+            return ['-jpeg']
+        if self is PageFormat.PNG:
+            return ['-png']
+
+        return None
+
+    @classmethod
+    def of(cls, path: Path) -> 'PageFormat':
+        suffix = path.suffix.lower().lstrip('.')
+        return cls({'jpeg': 'jpg', 'tiff': 'tif'}.get(suffix, suffix))
+
+
+def to_gray(image: numpy.ndarray) -> numpy.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def binarise(image: numpy.ndarray) -> numpy.ndarray:
+    _, binary = cv2.threshold(to_gray(image), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def write_page(path: Path, image: numpy.ndarray, dpi: int = DEFAULT_DPI) -> None:
+    """ write a page buffer (OpenCV layout) in the format its suffix names """
+
+    page_format = PageFormat.of(path)
+
+    if page_format is PageFormat.JPEG:
+        cv2.imwrite(str(path), image)
+    elif page_format is PageFormat.PNG:
+        # the fastest zlib level: pages are written once and read once, size matters less than time
+        cv2.imwrite(str(path), to_gray(image), [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    elif page_format is PageFormat.TIFF:
+        Image.fromarray(binarise(image)).convert('1').save(path, compression='group4', dpi=(dpi, dpi))
+    else:
+        numpy.save(path, to_gray(image))
+
+    return
+
+
+def read_page(path: Path) -> numpy.ndarray | None:
+    """ a page written by write_page or poppler, in OpenCV layout: BGR or grayscale; None if it can't be read """
+
+    if PageFormat.of(path) is PageFormat.NPY:
+        return numpy.load(path)
+
+    return cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+
+
+def open_page(path: Path) -> Image.Image | numpy.ndarray:
+    """ a page for tesseract: a PIL image, which keeps the resolution it was saved with, or a raw array """
+
+    if PageFormat.of(path) is PageFormat.NPY:
+        return numpy.load(path)
+
+    return Image.open(path)
@@ -1,25 +1,66 @@
 import os
+import queue
 import time
 import threading
-from math import ceil
 from pathlib import Path
 from threading import Thread
+from typing import Iterator
 
 import pdf2image as pdf2img
-from PIL import Image
+from numpy import ndarray
 
 from utils.error import error_dispatcher
-from utils.exception import FileTypeError
+from utils.exception import FileTypeError, JobCancelled, RenderError
+from utils.manifest import JobManifest, PageStage
+from utils.resources import ResourceManager
 from utils.status import good, info, progress, warn
 from utils.system import is_filetype, copy, create_new_directory, DirectoryContents
 
+from segment.page_format import PageFormat, write_page
+from segment.render import PAGE_PREFIX, page_number, page_runs, render_pages, RenderOptions, stream_pages
+
+SEGMENT_WORKERS: int = 4  # most poppler processes one document is rendered with
+
 
 class Segment:
-    def __init__(self, pdf: Path) -> None:
+    def __init__(
+            self,
+            pdf: Path,
+            in_memory: bool = False,
+            keep_intermediates: bool = False,
+            manifest: JobManifest | None = None,
+            resources: ResourceManager | None = None,
+            page_format: PageFormat = PageFormat.JPEG,
+            render: RenderOptions | None = None,
+            cancelled: threading.Event | None = None
+    ) -> None:
+        """
+        in_memory skips writing page images: pages are decoded from poppler on demand through iter_pages().
+        keep_intermediates still writes them to the image directory, for debugging.
+        With a resumable manifest the work directory is kept and only pages not yet rendered are rendered.
+        With resources, poppler processes are drawn from its budget instead of always starting SEGMENT_WORKERS.
+        page_format is the format page images are written in; formats poppler can't write are converted here.
+        render sets the resolution, colour and size cap pages are rasterised with; dpi is the resolution used.
+        Once cancelled is set, rendering stops after the page in progress, poppler is killed and JobCancelled raised.
+        """
+
         self.pdf_path = pdf
+        self.in_memory = in_memory
+        self.keep_intermediates = keep_intermediates
+        self.manifest = manifest
+        self.resources = resources
+        self.page_format = page_format
+        self.render = render or RenderOptions()
+        self.cancelled = cancelled
         self.work_dir = Path(self.pdf_path.parent, self.pdf_path.stem)
         self.img_dir = Path(self.work_dir, 'images')
-        self.page_count = self.count_page()
+
+        pdfinfo = pdf2img.pdfinfo_from_path(str(self.pdf_path))
+        self.page_count = pdfinfo['Pages']
+        self.dpi = self.render.dpi_for(pdfinfo.get('Page size'))
+
+        # a grayscale format would throw colour away on writing, so don't rasterise it in the first place
+        self.colour = 'gray' if self.render.colour == 'rgb' and page_format.grayscale else self.render.colour
 
         try:
             if not os.path.exists(self.pdf_path):
@@ -33,8 +74,16 @@ class Segment:
         self.start_time = None
         self.end_time = None
 
+        # render threads record pages and failed runs here and wake segment() to report them
+        self.rendered: list[int] = list()
+        self.errors: list[RenderError | JobCancelled] = list()
+        self.running = 0
+        self.changed = threading.Condition()
+
         self.create_work_directories()
-        self.segment()
+
+        if not self.in_memory:
+            self.segment()
 
         return
 
@@ -49,54 +98,166 @@ class Segment:
         return False
 
     def create_work_directories(self) -> None:
-        create_new_directory(self.work_dir)
+        resume = self.manifest is not None and self.manifest.resumable
+
+        create_new_directory(self.work_dir, clear=not resume)
         copy(self.pdf_path, self.work_dir)
 
-        create_new_directory(self.img_dir)
+        if not self.in_memory or self.keep_intermediates:
+            create_new_directory(self.img_dir, clear=not resume)
 
         return
 
+    def pending_pages(self) -> list[int]:
+        """ pages that still need an image: not yet scanned, and not rendered or since deleted """
+
+        pages = list(range(1, self.page_count + 1))
+
+        if self.manifest is None:
+            return pages
+
+        rendered = {page_number(Path(image)) for image in os.listdir(self.img_dir)}
+
+        return [
+            page for page in self.manifest.pending(PageStage.SCANNED, pages)
+            if not (self.manifest.done(page, PageStage.RENDERED) and page in rendered)
+        ]
+
     def segment(self):
         threads: list[Thread]
-        update: list[int]
-        batch: int
+        pages: list[int]
 
         threads = list()
-        update = list()
-        batch = ceil(self.page_count / 4)
+        pages = self.pending_pages()
+
+        if not pages:
+            info("All pages already converted.")
+            return
 
-        info("Converting .pdf to .jpgs.")
+        info(f"Converting .pdf to {self.page_format.suffix}s.")
         self.start_time = time.time()
 
-        for i in range(1, self.page_count + 1, batch):
-            begin = i
-            end = min(i + batch, self.page_count + 1)
+        slots = (self.resources or ResourceManager(SEGMENT_WORKERS)).acquire(SEGMENT_WORKERS)
+
+        with slots:
+            # gaps left by a resumed job split pages into more runs than slots: threads take runs in turn,
+            # so no more than slots.count poppler processes ever run at once
+            runs = queue.SimpleQueue()
+
+            for run in page_runs(pages, slots.count):
+                runs.put(run)
+
+            with self.changed:
+                self.rendered.clear()
+                self.errors.clear()
+                self.running = min(slots.count, runs.qsize())
 
-            thread = threading.Thread(target=self.thread_segment, args=(begin, end, update))
-            threads.append(thread)
-            thread.start()
+            for _ in range(self.running):
+                thread = threading.Thread(target=self.render_runs, args=(runs,))
+                threads.append(thread)
+                thread.start()
 
-        while len(update) < self.page_count:
-            progress(
-                text=f"Pages converted: {len(update)} of {self.page_count}.",
-                end='' if len(update) < self.page_count - 1 else '\r'
-            )
+            self.report_progress(len(pages))
 
-        for thread in threads:
-            thread.join()
+            for thread in threads:
+                thread.join()
+
+        # a page missing from the images would go missing from the document without a word
+        if self.errors:
+            raise next((e for e in self.errors if isinstance(e, JobCancelled)), self.errors[0])
 
         self.end_time = time.time()
         good(f"Conversion completed in {(self.end_time - self.start_time):.2f}.\n")
 
         return
 
-    def thread_segment(self, begin: int, end: int, update: list[int]):
-        for page in range(begin, end):
-            image = pdf2img.convert_from_path(
-                pdf_path=self.pdf_path, timeout=20, first_page=page, last_page=page+1
-            )
-            self.save_image(image[0], page)
-            update.append(page)
+    def report_progress(self, total: int) -> None:
+        """ sleep until a render thread finishes a page or exits, reporting each new count once """
+
+        reported = None
+
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: len(self.rendered) != reported or not self.running)
+                count = len(self.rendered)
+                running = self.running
+
+            if count != reported:
+                progress(text=f"Pages converted: {count} of {total}.", end='' if count < total else '\r')
+                reported = count
+
+            if not running:
+                break
+
+        return
+
+    def render_runs(self, runs: queue.SimpleQueue) -> None:
+        """ render (begin, end) runs from the queue until it is empty """
+
+        try:
+            while True:
+                try:
+                    begin, end = runs.get_nowait()
+                except queue.Empty:
+                    break
+
+                if self.errors:
+                    break
+
+                self.thread_segment(begin, end)
+        finally:
+            with self.changed:
+                self.running -= 1
+                self.changed.notify()
+
+        return
+
+    def thread_segment(self, begin: int, end: int):
+        """ render pages begin..end (inclusive) with one poppler call, straight into the image directory """
+
+        def rendered(page: int, _) -> None:
+            self.check_cancelled()
+
+            if self.manifest:
+                self.manifest.mark(page, PageStage.RENDERED)
+
+            with self.changed:
+                self.rendered.append(page)
+                self.changed.notify()
+
+        image_options = self.page_format.poppler_option(self.colour)
+
+        try:
+            if image_options:
+                render_pages(
+                    self.pdf_path, begin, end, self.img_dir, on_page=rendered,
+                    dpi=self.dpi, image_options=image_options, colour=self.colour
+                )
+            else:
+                for page, image in stream_pages(self.pdf_path, begin, end, dpi=self.dpi, colour=self.colour):
+                    path = Path(self.img_dir, f"{PAGE_PREFIX}-{page}{self.page_format.suffix}")
+                    write_page(path, image, dpi=self.dpi)
+                    rendered(page, path)
+        except (RenderError, JobCancelled) as e:
+            with self.changed:
+                self.errors.append(e)
+
+        return
+
+    def iter_pages(self, first_page: int = 1) -> Iterator[tuple[int, ndarray]]:
+        """ render the document from first_page in one poppler call, yielding (page, decoded image) in page order """
+
+        for page, image in stream_pages(self.pdf_path, first_page, self.page_count, dpi=self.dpi, colour=self.colour):
+            self.check_cancelled()
+
+            if self.keep_intermediates:
+                self.save_array(image, f"{page}")
+
+            yield page, image
+
+    def check_cancelled(self) -> None:
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise JobCancelled()
 
         return
 
@@ -106,11 +267,7 @@ class Segment:
 
         return images
 
-    def save_image(self, image: Image, i: int) -> None:
-        path = Path(self.img_dir, f"{i}.jpg")
-        image.save(path, 'JPEG')
+    def save_array(self, image: ndarray, name: str) -> None:
+        write_page(Path(self.img_dir, f"{name}{self.page_format.suffix}"), image, dpi=self.dpi)
 
         return
-
-    def count_page(self) -> int:
-        return pdf2img.pdfinfo_from_path(str(self.pdf_path))['Pages']
@@ -0,0 +1,300 @@
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from math import ceil
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+import numpy
+
+from utils.exception import RenderError
+
+DEFAULT_DPI: int = 200  # matches the pdf2image default the per-page path used
+PAGE_TIMEOUT: int = 20  # seconds allowed per page before poppler is killed
+PAGE_PREFIX: str = 'page'
+COLOURS: tuple[str, ...] = ('rgb', 'gray', 'mono')
+
+_PROGRESS_LINE = re.compile(r'^(\d+) (\d+) (.+)$')
+_PAGE_NAME = re.compile(rf'^{PAGE_PREFIX}-(\d+)\.')
+_PAGE_SIZE = re.compile(r'^([\d.]+) x ([\d.]+) pts')
+
+
+class RenderOptions:
+    """
+    How poppler rasterises a document's pages.
+
+    colour is 'rgb', 'gray' or 'mono' (1 bit, thresholded by poppler). Preprocessing and tesseract work on
+    grayscale, so gray gives them the same page for a third of the bytes rgb does.
+    max_size caps the longer side of a page in pixels: a document whose pages would be larger at dpi is rendered
+    at the highest resolution that fits instead, which tesseract is then told, unlike with pdftoppm -scale-to.
+    """
+
+    def __init__(self, dpi: int = DEFAULT_DPI, colour: str = 'gray', max_size: int | None = None) -> None:
+        if colour not in COLOURS:
+            raise ValueError(f"Colour must be one of {', '.join(COLOURS)}, not '{colour}'.")
+
+        self.dpi = dpi
+        self.colour = colour
+        self.max_size = max_size
+
+        return
+
+    def dpi_for(self, page_size: str | None) -> int:
+        """ the resolution to render pages of a pdfinfo 'Page size' (e.g. '612 x 792 pts (letter)') at """
+
+        match = _PAGE_SIZE.match(page_size or '')
+
+        if not self.max_size or not match:
+            return self.dpi
+
+        inches = max(float(match.group(1)), float(match.group(2))) / 72
+
+        return max(1, min(self.dpi, int(self.max_size / inches)))
+
+    def settings(self) -> dict:
+        return {'dpi': self.dpi, 'colour': self.colour, 'max_size': self.max_size}
+
+
+def page_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    """
+    Split pages 1..page_count into at most `workers` contiguous, inclusive (first, last) ranges.
+    """
+
+    return page_runs(list(range(1, page_count + 1)), workers)
+
+
+def page_runs(pages: list[int], workers: int) -> list[tuple[int, int]]:
+    """
+    Split an ascending list of pages into contiguous, inclusive (first, last) ranges of at most
+    len(pages) / workers pages each. Gaps in the list always start a new range.
+    """
+
+    runs: list[tuple[int, int]]
+
+    batch = max(1, ceil(len(pages) / max(1, workers)))
+    runs = list()
+
+    for page in pages:
+        if runs and page == runs[-1][1] + 1 and runs[-1][1] - runs[-1][0] + 1 < batch:
+            runs[-1] = (runs[-1][0], page)
+        else:
+            runs.append((page, page))
+
+    return runs
+
+
+def page_number(image: Path) -> int | None:
+    """ the page an image written by render_pages holds, from its file name """
+
+    match = _PAGE_NAME.match(image.name)
+    return int(match.group(1)) if match else None
+
+
+def render_pages(
+        pdf: Path,
+        first_page: int,
+        last_page: int,
+        output_dir: Path,
+        on_page: Callable[[int, Path], None] | None = None,
+        dpi: int = DEFAULT_DPI,
+        poppler_path: str | None = None,
+        image_options: list[str] | None = None,
+        colour: str = 'rgb'
+) -> list[Path]:
+    """
+    Render an inclusive page range of a .pdf with a single pdftoppm call.
+
+    Poppler parses the document once and writes every page straight into output_dir.
+    on_page is called with (page, path) as soon as poppler reports each page finished; if it raises, e.g. because
+    the job was cancelled, poppler is killed and the exception propagates.
+    image_options are the pdftoppm options choosing the output format, JPEG by default.
+    colour is one of COLOURS.
+
+    Returns the rendered image paths in page order.
+    """
+
+    pages: list[Path]
+    errors: list[str]
+
+    executable = os.path.join(poppler_path, 'pdftoppm') if poppler_path else 'pdftoppm'
+    command = [
+        executable, '-progress', *(image_options or ['-jpeg']), *_colour_option(colour), '-r', str(dpi),
+        '-f', str(first_page), '-l', str(last_page),
+        str(pdf), str(Path(output_dir, PAGE_PREFIX))
+    ]
+
+    pages = list()
+    errors = list()
+
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    except OSError as e:
+        raise RenderError(first_page, last_page, str(e))
+
+    timer = threading.Timer(PAGE_TIMEOUT * (last_page - first_page + 1), process.kill)
+    timer.start()
+
+    try:
+        for line in process.stderr:
+            match = _PROGRESS_LINE.match(line.strip())
+            if not match:
+                errors.append(line.strip())
+                continue
+
+            page, path = int(match.group(1)), Path(match.group(3))
+            pages.append(path)
+
+            if on_page:
+                on_page(page, path)
+
+        process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    if process.returncode != 0:
+        raise RenderError(first_page, last_page, '; '.join(errors) or f"pdftoppm exited with {process.returncode}")
+
+    return pages
+
+
+def stream_pages(
+        pdf: Path,
+        first_page: int,
+        last_page: int,
+        dpi: int = DEFAULT_DPI,
+        poppler_path: str | None = None,
+        colour: str = 'rgb'
+) -> Iterator[tuple[int, numpy.ndarray]]:
+    """
+    Render an inclusive page range of a .pdf with a single pdftoppm call, without touching disk.
+
+    Poppler writes raw PNM images to stdout one page after another; each is decoded straight into
+    a numpy array in OpenCV's layout (BGR, or greyscale) and yielded with its page number, in order.
+    With colour 'gray' or 'mono', pages are greymaps or bitmaps and decode to 2D arrays.
+    """
+
+    executable = os.path.join(poppler_path, 'pdftoppm') if poppler_path else 'pdftoppm'
+    command = [
+        executable, *_colour_option(colour), '-r', str(dpi), '-f', str(first_page), '-l', str(last_page), str(pdf)
+    ]
+
+    with tempfile.TemporaryFile() as errors:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        except OSError as e:
+            raise RenderError(first_page, last_page, str(e))
+
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            process.kill()
+
+        # only time poppler while a page is being read: between pages the consumer may hold the generator for
+        # as long as it likes, e.g. while the pipeline's queues wait on OCR
+        page = first_page
+
+        try:
+            while True:
+                timer = threading.Timer(PAGE_TIMEOUT, kill)
+                timer.start()
+
+                try:
+                    image = _read_pnm(process.stdout)
+                except (EOFError, ValueError) as e:
+                    reason = str(e).rstrip('.')
+
+                    if timed_out.is_set():
+                        reason = f"page timed out after {PAGE_TIMEOUT} seconds"
+
+                    raise RenderError(page, last_page, reason)
+                finally:
+                    timer.cancel()
+
+                if image is None:
+                    break
+
+                yield page, image
+                page += 1
+
+            process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if process.returncode != 0:
+            errors.seek(0)
+            reason = errors.read().decode(errors='replace').strip()
+
+            if timed_out.is_set():
+                reason = f"page timed out after {PAGE_TIMEOUT} seconds"
+
+            raise RenderError(page, last_page, reason or f"pdftoppm exited with {process.returncode}")
+
+    return
+
+
+def _colour_option(colour: str) -> list[str]:
+    return [] if colour == 'rgb' else [f"-{colour}"]
+
+
+def _read_pnm(stream: BinaryIO) -> numpy.ndarray | None:
+    """ Read one binary PNM image (P4 bitmap, P5 greymap, P6 pixmap) from a stream; None at end of stream. """
+
+    magic = _read_token(stream)
+    if not magic:
+        return None
+
+    width, height = int(_read_token(stream)), int(_read_token(stream))
+    channels = {b'P4': 0, b'P5': 1, b'P6': 3}.get(magic)
+
+    if channels is None:
+        raise ValueError(f"Unsupported PNM type {magic!r}.")
+
+    if channels == 0:
+        row_bytes = (width + 7) // 8
+        bits = numpy.frombuffer(_read_exact(stream, row_bytes * height), numpy.uint8).reshape(height, row_bytes)
+        # PBM stores ink as 1; invert so the page is white (255) with black (0) text, like the other formats
+        return numpy.where(numpy.unpackbits(bits, axis=1)[:, :width], 0, 255).astype(numpy.uint8)
+
+    if int(_read_token(stream)) > 255:
+        raise ValueError("16-bit PNM images are not supported.")
+
+    pixels = numpy.frombuffer(_read_exact(stream, width * height * channels), numpy.uint8)
+
+    if channels == 1:
+        return pixels.reshape(height, width)
+
+    return numpy.ascontiguousarray(pixels.reshape(height, width, 3)[:, :, ::-1])
+
+
+def _read_token(stream: BinaryIO) -> bytes:
+    """ Read a whitespace-delimited header token, skipping comments; consumes the single trailing whitespace byte. """
+
+    token = bytearray()
+
+    while char := stream.read(1):
+        if char == b'#' and not token:
+            stream.readline()
+        elif char.isspace():
+            if token:
+                break
+        else:
+            token += char
+
+    return bytes(token)
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+
+    if len(data) != size:
+        raise EOFError(f"PNM data truncated: expected {size} bytes, got {len(data)}.")
+
+    return data
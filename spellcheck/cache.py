@@ -0,0 +1,77 @@
+import hashlib
+import os
+from pathlib import Path
+
+from utils.status import warn
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = SCRIPT_DIR.parent
+CACHE_DIR = Path(PROJECT_DIR, 'cache')
+
+# bump whenever the way dictionaries are loaded changes (indices, separators, SymSpell settings)
+CACHE_VERSION: str = '1'
+CACHE_PREFIX: str = 'symspell_'
+CLAUSE_CACHE_PREFIX: str = 'clauses_'
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def dictionary_fingerprint(std_dict: list[Path], bigram_dict: list[Path]) -> str:
+    """
+    Identify a set of loaded dictionaries by their contents.
+
+    Renaming or touching a file leaves the fingerprint unchanged; editing, adding or removing one changes it.
+    """
+
+    digest = hashlib.sha256(CACHE_VERSION.encode())
+
+    for kind, paths in (('std', std_dict), ('bigram', bigram_dict)):
+        for content in sorted(file_digest(path) for path in paths):
+            digest.update(f"{kind}:{content};".encode())
+
+    return digest.hexdigest()
+
+
+def compiled_dictionary_path(fingerprint: str) -> Path:
+    return Path(CACHE_DIR, f"{CACHE_PREFIX}{fingerprint[:32]}.bin")
+
+
+def clause_cache_path(fingerprint: str) -> Path:
+    return Path(CACHE_DIR, f"{CLAUSE_CACHE_PREFIX}{fingerprint[:32]}.pkl")
+
+
+def prune_compiled_dictionaries(keep: Path) -> None:
+    """ Remove compiled dictionaries for sets that are no longer loaded. """
+
+    _prune(CACHE_PREFIX, keep)
+
+    return
+
+
+def prune_clause_caches(keep: Path) -> None:
+    """ Remove clause corrections made against dictionary sets that are no longer loaded. """
+
+    _prune(CLAUSE_CACHE_PREFIX, keep)
+
+    return
+
+
+def _prune(prefix: str, keep: Path) -> None:
+    for item in os.listdir(CACHE_DIR):
+        path = Path(CACHE_DIR, item)
+
+        if item.startswith(prefix) and path != keep:
+            try:
+                os.remove(path)
+            except OSError as e:
+                warn(e)
+
+    return
@@ -1,7 +1,12 @@
 import os
 import re
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from math import ceil
 from pathlib import Path
+from typing import Iterable, Iterator
 
 import SymSpellCppPy
 
@@ -9,30 +14,45 @@ from utils.error import error_dispatcher
 from utils.status import info, good, progress, warn
 from utils.system import delete, DirectoryContents
 
-from .utils import fix_encoding_errors, prepare_text_for_analysis, restitch_text
+from .utils import fix_encoding_errors, restitch_clauses, tokenise_clauses
 from .bundle import bundle_dictionaries
+from .cache import (
+    CACHE_DIR, clause_cache_path, compiled_dictionary_path, dictionary_fingerprint, prune_clause_caches,
+    prune_compiled_dictionaries
+)
+from .memo import ClauseCache
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_DIR = SCRIPT_DIR.parent
 DICTIONARY_DIR = Path(PROJECT_DIR, 'dictionaries')
 
+SHARDS_PER_WORKER: int = 4  # more, smaller shards even out the load across workers
+STREAM_CHUNK: int = 2000  # paragraphs held in memory at once when streaming
+
 
 # TODO: merge spellcheck and spellcheck_batch into one function
 #   like segment object, have it run the spellcheck in the init
 #   then have one function for retrieving the result
 class Spellchecker(SymSpellCppPy.SymSpell):
-    def __init__(self) -> None:
+    def __init__(self, persist_cache: bool = False, cache_capacity: int = 200_000) -> None:
         super().__init__()
         self.clause_separator = re.compile(r"[.?!,:']+")  # this is unused
         self.verbosity = SymSpellCppPy.Verbosity.CLOSEST  # i don't think this is used either
 
         self.loaded = False
         self.dictionaries = DICTIONARY_DIR
+        self.fingerprint = None
         self.temp_std_dict_path = None  # TODO: shift these over to the /tmp path
         self.temp_bigram_dict_path = None
 
+        self.clause_cache = ClauseCache(cache_capacity)
+        self.persist_cache = persist_cache
+
         self.load_dictionaries()
 
+        if self.persist_cache and self.fingerprint:
+            self.clause_cache.load(clause_cache_path(self.fingerprint))
+
         return
 
     def __enter__(self):
@@ -44,6 +64,11 @@ class Spellchecker(SymSpellCppPy.SymSpell):
         if self.temp_bigram_dict_path:
             delete(self.temp_bigram_dict_path)
 
+        if self.persist_cache and self.fingerprint and self.clause_cache.misses:
+            path = clause_cache_path(self.fingerprint)
+            self.clause_cache.save(path)
+            prune_clause_caches(keep=path)
+
     def load_dictionaries(self) -> None:
         dictionaries: DirectoryContents
         std_dict: list[str]
@@ -61,6 +86,16 @@ class Spellchecker(SymSpellCppPy.SymSpell):
         bigram_dict = list(filter(lambda x: "bigram" in x, dictionaries))
         del dictionaries
 
+        if not std_dict and not bigram_dict:
+            return
+
+        self.fingerprint = dictionary_fingerprint(
+            [Path(item) for item in std_dict], [Path(item) for item in bigram_dict]
+        )
+
+        if self.load_compiled_dictionary():
+            return
+
         # bundle dictionaries into one dictionary
         if std_dict:
             self.temp_std_dict_path = bundle_dictionaries([Path(item) for item in std_dict])
@@ -70,14 +105,74 @@ class Spellchecker(SymSpellCppPy.SymSpell):
             self.loaded = True
 
         if bigram_dict:
-            self.temp_bigram_dict_path = bundle_dictionaries([Path(item) for item in std_dict])
+            self.temp_bigram_dict_path = bundle_dictionaries([Path(item) for item in bigram_dict])
             self.load_bigram_dictionary(
                 corpus=str(self.temp_bigram_dict_path), term_index=0, count_index=2, separator=' '
             )
             self.loaded = True
 
+        self.save_compiled_dictionary()
+
         return
 
+    def load_compiled_dictionary(self) -> bool:
+        """ load the index for the current dictionary set from the cache, if it has been compiled before """
+
+        path = compiled_dictionary_path(self.fingerprint)
+
+        if not os.path.exists(path):
+            return False
+
+        try:
+            self.load_pickle(str(path))
+        except (RuntimeError, OSError, ValueError) as e:
+            warn(e)
+            info("Compiled dictionary unreadable, rebuilding.")
+            delete(path)
+            return False
+
+        self.loaded = True
+
+        return True
+
+    def save_compiled_dictionary(self) -> None:
+        """ write the index to a temporary file and move it into place, so no process reads it half-written """
+
+        path = compiled_dictionary_path(self.fingerprint)
+        temp = None
+
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # not named like a compiled dictionary, so another process pruning the cache leaves it alone
+            fd, temp = tempfile.mkstemp(dir=CACHE_DIR, prefix='.compiling_', suffix='.tmp')
+            os.close(fd)
+            self.save_pickle(temp)
+            os.replace(temp, path)
+        except (RuntimeError, OSError) as e:
+            warn(e)
+            if temp and os.path.exists(temp):
+                delete(Path(temp))
+            return
+
+        prune_compiled_dictionaries(keep=path)
+
+        return
+
+    def correct_clause(self, clause: str, max_edit_distance: int = 2, transfer_casing: bool = True) -> str:
+        """ lookup_compound, memoised: repeated clauses (running headers, names, stock phrases) are looked up once """
+
+        key = (clause, max_edit_distance, transfer_casing, self.fingerprint)
+        correction = self.clause_cache.get(key)
+
+        if correction is None:
+            suggestion = self.lookup_compound(
+                input=clause, max_edit_distance=max_edit_distance, transfer_casing=transfer_casing
+            )
+            correction = suggestion[0].term
+            self.clause_cache.put(key, correction)
+
+        return correction
+
     def spellcheck(self, paragraph: str, log: bool = True) -> str:
 
         """ lookup compound with bigram dictionary seems to be much better at getting the correct word
@@ -89,23 +184,19 @@ class Spellchecker(SymSpellCppPy.SymSpell):
             info("Spellchecking.")
 
         start = time.time()
-        clauses, indices = prepare_text_for_analysis(paragraph)
+        clauses, spans = tokenise_clauses(paragraph)
 
         for i, clause in enumerate(clauses):
 
             if len(clause.strip()) < 2:
                 continue
 
-            suggestion = self.lookup_compound(
-                input=clause, max_edit_distance=2, transfer_casing=True
-            )
-
             try:
-                clauses[i] = suggestion[0].term
+                clauses[i] = self.correct_clause(clause)
             except UnicodeDecodeError as e:
                 clauses[i] = fix_encoding_errors(clause, e)
 
-        paragraph = restitch_text(clauses, indices, paragraph)
+        paragraph = restitch_clauses(clauses, spans, paragraph)
         end = time.time()
 
         if log:
@@ -113,7 +204,25 @@ class Spellchecker(SymSpellCppPy.SymSpell):
 
         return paragraph
 
-    def spellcheck_batch(self, paragraphs: list[str]) -> list[str]:
+    def check_paragraph(self, paragraph: str) -> str:
+        clauses, spans = tokenise_clauses(paragraph)
+
+        for j, clause in enumerate(clauses):
+
+            if len(clause.strip()) < 2:
+                continue
+
+            try:
+                clauses[j] = self.correct_clause(clause)
+            except UnicodeEncodeError as e:
+                warn(e)
+                continue
+            except UnicodeDecodeError as exc:
+                clauses[j] = fix_encoding_errors(exc)
+
+        return restitch_clauses(clauses, spans, paragraph)
+
+    def spellcheck_batch(self, paragraphs: list[str], worker_count: int = 1) -> list[str]:
 
         """ lookup compound with bigram dictionary seems to be much better at getting the correct word
             but it simply doesn't get it right all the time. it would probably be good to build an irish
@@ -122,44 +231,75 @@ class Spellchecker(SymSpellCppPy.SymSpell):
 
         checked_paragraphs: list[str]
 
+        checked_paragraphs = list()
+
+        # one chunk: the whole batch is in memory already, and the pool is only started once either way
+        worker_count = worker_count if len(paragraphs) > 1 else 1
+
+        for checked in self.spellcheck_stream(paragraphs, worker_count, chunk_size=max(1, len(paragraphs))):
+            checked_paragraphs.extend(checked)
+
+        return checked_paragraphs
+
+    def spellcheck_stream(
+            self, paragraphs: Iterable[str], worker_count: int = 1, chunk_size: int = STREAM_CHUNK
+    ) -> Iterator[list[str]]:
+        """
+        Spellcheck an iterable of paragraphs lazily, yielding corrected chunks of at most chunk_size in order.
+
+        Only one chunk is held in memory at a time, so callers can write each chunk out as it arrives.
+        A single worker pool is kept for the whole stream.
+        """
+
         info("Spellchecking.")
 
-        checked_paragraphs = list()
-        paragraph_count = len(paragraphs)
         start = time.time()
+        done = 0
+        paragraphs = iter(paragraphs)
+        executor = ProcessPoolExecutor(max_workers=worker_count, initializer=_init_worker) if worker_count > 1 else None
+
+        try:
+            while chunk := list(islice(paragraphs, chunk_size)):
+                if executor:
+                    checked = [
+                        paragraph
+                        for shard in executor.map(_check_shard, _shard(chunk, worker_count))
+                        for paragraph in shard
+                    ]
+                else:
+                    checked = [self.check_paragraph(paragraph) for paragraph in chunk]
+
+                done += len(checked)
+                progress(f"Spellchecked paragraphs: {done}.")
+
+                yield checked
+        finally:
+            if executor:
+                executor.shutdown()
+
+        end = time.time()
 
-        for i, paragraph in enumerate(paragraphs):
-            if "Digitized by mel Archive" in paragraph:
-                pass
+        progress(f"Spellchecked paragraphs: {done}.", end='\r')
 
-            clauses, indices = prepare_text_for_analysis(paragraph)
+        if self.clause_cache.hits or self.clause_cache.misses:
+            info(f"Clause cache: {self.clause_cache.stats()}.")
+        good(f"Spellchecked in {(end - start):.2f} seconds.\n")
 
-            for j, clause in enumerate(clauses):
+        return
 
-                if len(clause.strip()) < 2:
-                    continue
 
-                suggestion = self.lookup_compound(
-                    input=clause, max_edit_distance=2, transfer_casing=True
-                )
+_worker_spellchecker: Spellchecker | None = None
 
-                try:
-                    clauses[j] = suggestion[0].term
-                except UnicodeEncodeError as e:
-                    warn(e)
-                    continue
-                except UnicodeDecodeError as exc:
-                    clauses[j] = fix_encoding_errors(exc)
 
-            checked_paragraphs.append(restitch_text(clauses, indices, paragraph))
+def _init_worker() -> None:
+    global _worker_spellchecker
+    _worker_spellchecker = Spellchecker()
 
-            progress(
-                f"Spellchecked paragraphs: {i + 1} out of {paragraph_count}.",
-                end='' if i + 1 < paragraph_count else '\r'
-            )
 
-        end = time.time()
+def _shard(paragraphs: list[str], worker_count: int) -> list[list[str]]:
+    shard_size = max(1, ceil(len(paragraphs) / (worker_count * SHARDS_PER_WORKER)))
+    return [paragraphs[i:i + shard_size] for i in range(0, len(paragraphs), shard_size)]
 
-        good(f"Spellchecked in {(end - start):.2f} seconds.\n")
 
-        return checked_paragraphs
+def _check_shard(paragraphs: list[str]) -> list[str]:
+    return [_worker_spellchecker.check_paragraph(paragraph) for paragraph in paragraphs]
@@ -0,0 +1,85 @@
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.status import warn
+
+ClauseKey = tuple[str, int, bool, str]
+
+
+class ClauseCache:
+    """
+    Bounded LRU of clause corrections.
+
+    Keys are (clause, max_edit_distance, transfer_casing, dictionary fingerprint), so a correction is only
+    reused for the same lookup against the same dictionaries. The least recently used entry is evicted
+    once capacity is reached.
+    """
+
+    def __init__(self, capacity: int = 200_000) -> None:
+        self.capacity = capacity
+        self.entries: OrderedDict[ClauseKey, str] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        return
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: ClauseKey) -> str | None:
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, key: ClauseKey, value: str) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+        return
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> str:
+        return (f"{self.hits} hits, {self.misses} misses ({self.hit_rate():.1%} hit rate), "
+                f"{len(self.entries)} of {self.capacity} entries")
+
+    def save(self, path: Path) -> None:
+        try:
+            os.makedirs(path.parent, exist_ok=True)
+            with open(path, 'wb') as f:
+                pickle.dump(list(self.entries.items()), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            warn(e)
+
+        return
+
+    def load(self, path: Path) -> None:
+        if not os.path.exists(path):
+            return
+
+        try:
+            with open(path, 'rb') as f:
+                entries = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            warn(e)
+            return
+
+        for key, value in entries[-self.capacity:]:
+            self.entries[key] = value
+
+        return
@@ -1,7 +1,11 @@
-from sys import exit
+import re
 
 from utils.status import info, warn
 
+PUNCTUATION: str = ",.;:!?—*‘’()"
+
+_CLAUSE = re.compile(f"[^{re.escape(PUNCTUATION)}]+")
+
 
 def fix_byte(bad_string: str, bad_byte: str, replacement: str) -> str:
     return bad_string.replace(bad_byte, replacement)
@@ -21,92 +25,41 @@ def fix_encoding_errors(exc: UnicodeDecodeError) -> str:
         return byte_repr.decode('utf-8') if isinstance(byte_repr, bytes) else byte_repr
 
 
-def prepare_text_for_analysis(text: str) -> tuple[list[str], list[int]]:
+def tokenise_clauses(text: str) -> tuple[list[str], list[tuple[int, int]]]:
 
     """
     Breaks text into clauses without punctuation for spellchecking.
 
-    Returns a tuple: clauses, indices.
-    Clauses are used for analysis, indices are needed to re-stitch text after processing.
+    Returns a tuple: clauses, spans.
+    Spans are the (start, end) offsets of each clause in text, needed to re-stitch text after processing.
 
-    Call restitch_text to re-stitch text.
+    Call restitch_clauses to re-stitch text.
     """
 
-    indices = []
-    strings = []
-    current_str = []
-
-    for i, char in enumerate(text):
-        if _is_punctuation(char):
-            clause = "".join(current_str)
-            if clause:
-                strings.append(clause)
-            current_str.clear()
-            indices.append(i)
-        else:
-            current_str.append(char)
-
-    if current_str:
-        clause = "".join(current_str)
-        if clause:
-            strings.append(clause)
-
-    return strings, indices
-
-
-def restitch_text(text: list[str], indices: list[int], original_text: str) -> str:
-    length = len(original_text)
-    modified_text = original_text
-    i = 0
-
-    while text:
-
-        try:
-            if i > len(original_text) + 1000:
-                raise IndexError(f"Index i: {i} out of bounds.")
-        except IndexError as e:
-            warn(e)
-            info(f"Original bounds: {len(original_text)}.")
-            warn("Aborting spellchecking, returning original text.")
-            return original_text
-
-        try:
-            char = modified_text[i]
-        except IndexError as e:
-            print(f"\nException: {e}.")
-            warn(f"Error at at index '{i}' where modified text:\n'{modified_text}'.")
-            print(f"{'-' * (i + 5)}^")
-            exit(1)
-
-        if _is_punctuation(char):
-
-            if indices and i == indices[0]:
-                indices.remove(indices[0])
-            i += 1
-
-        else:
-
-            sliced = modified_text[i: indices[0]] if indices else modified_text[i:]
-
-            try:
-                modified_text = modified_text.replace(sliced, _should_insert_space(text[0], sliced))
-            except MemoryError as e:  # TODO: figure out why this exception is here
-                warn(e)
-                info(f"modified_text: '{modified_text}'. sliced: '{sliced}. text[0]: '{text[0]}'.")
-
-            diff = (length - len(modified_text)) * -1
-            indices = [x + diff for x in indices]
-            length += diff
-            if indices:
-                i = indices[0] + 1
-                indices.remove(indices[0])
-            text.remove(text[0])
-
-    return modified_text
-
-
-def _is_punctuation(char: str) -> bool:
-    return char in ",.;:!?—*‘’()"
+    spans = [match.span() for match in _CLAUSE.finditer(text)]
+
+    return [text[start:end] for start, end in spans], spans
+
+
+def restitch_clauses(clauses: list[str], spans: list[tuple[int, int]], original_text: str) -> str:
+
+    """
+    Rebuild text with each clause replaced by its counterpart in clauses.
+
+    Punctuation and anything between spans is copied from original_text unchanged.
+    """
+
+    pieces = list()
+    previous = 0
+
+    for (start, end), clause in zip(spans, clauses):
+        pieces.append(original_text[previous:start])
+        pieces.append(_should_insert_space(clause, original_text[start:end]))
+        previous = end
+
+    pieces.append(original_text[previous:])
+
+    return "".join(pieces)
 
 
 def _should_insert_space(text: str, comparison: str) -> str:
@@ -0,0 +1,126 @@
+import argparse
+import os
+from pathlib import Path
+
+from utils.error import error_dispatcher
+from utils.handle_file import discern_type_all, discern_type_scan, discern_type_spellcheck
+from utils.session import limit_engine_threads, Session
+from utils.status import good, no_progress, set_progress_sink, warn
+
+COMMANDS = {
+    'all': discern_type_all,
+    'scan': discern_type_scan,
+    'spellcheck': discern_type_spellcheck
+}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='tara',
+        description="Scan and spellcheck images, documents and text files without the graphical interface."
+    )
+
+    parser.add_argument(
+        'command', choices=COMMANDS,
+        help="'scan' to OCR .pdf/.jpg/.png files, 'spellcheck' for .txt files, 'all' to do whichever applies"
+    )
+    parser.add_argument('paths', nargs='+', type=Path, metavar='PATH', help="files or directories to process")
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1,
+        help="cores to share between rendering, OCR and spellchecking (default: all cores)"
+    )
+    parser.add_argument('--psm', type=int, default=3, help="tesseract page segmentation mode (default: 3)")
+    parser.add_argument(
+        '--in-memory', action='store_true',
+        help="pass pages between stages in memory instead of writing page images"
+    )
+    parser.add_argument(
+        '--keep-intermediates', action='store_true', help="write page images anyway, with --in-memory"
+    )
+    parser.add_argument(
+        '--persist-cache', action='store_true', help="keep spellchecker corrections between runs"
+    )
+    parser.add_argument(
+        '--keep-margins', action='store_true', help="keep running headers and page numbers in the text of .pdf files"
+    )
+    parser.add_argument(
+        '--page-format', choices=['jpg', 'png', 'tif', 'npy'], default='jpg',
+        help="how .pdf page images are stored: jpg, grayscale png, 1-bit G4 tif or raw npy (default: jpg)"
+    )
+    parser.add_argument('--dpi', type=int, help="resolution .pdf pages are rendered at (default: 200)")
+    parser.add_argument(
+        '--colour', choices=['rgb', 'gray', 'mono'], default='gray',
+        help="render .pdf pages in colour, grayscale or 1-bit monochrome (default: gray)"
+    )
+    parser.add_argument(
+        '--max-size', type=int, metavar='PIXELS',
+        help="lower the resolution of .pdf pages whose longer side would be over PIXELS"
+    )
+    parser.add_argument('--no-scan-cache', action='store_true', help="always OCR pages, even if scanned before")
+    parser.add_argument('--no-progress', action='store_true', help="don't print progress counters, only messages")
+    parser.add_argument(
+        '--restart', action='store_true', help="start .pdf jobs over instead of resuming from their manifest"
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """ run one command over every path; returns the exit status: 1 if any error was raised, 130 if interrupted """
+
+    errors: list[tuple[str, str]]
+
+    args = parse_args(argv)
+    process = COMMANDS[args.command]
+    errors = list()
+
+    def report(title: str, message: str) -> None:
+        errors.append((title, message))
+        warn(f"{title}: {message}")
+
+    error_dispatcher.error.connect(report)
+
+    if args.no_progress:
+        set_progress_sink(no_progress)
+
+    limit_engine_threads(args.workers)
+
+    session = Session(
+        persist_clause_cache=args.persist_cache,
+        worker_count=args.workers,
+        in_memory=args.in_memory,
+        keep_intermediates=args.keep_intermediates,
+        cache_scans=not args.no_scan_cache,
+        resume=not args.restart,
+        psm=args.psm,
+        strip_margins=not args.keep_margins,
+        page_format=args.page_format,
+        dpi=args.dpi,
+        colour=args.colour,
+        max_size=args.max_size
+    )
+
+    try:
+        with session:
+            for path in args.paths:
+                path = path.resolve()
+
+                if not path.exists():
+                    error_dispatcher.raise_error("File not found", f"'{path}' does not exist.")
+                    continue
+
+                process(path, session)
+    except KeyboardInterrupt:
+        warn("Interrupted, finished pages are kept and will be resumed.")
+        return 130
+    finally:
+        error_dispatcher.error.disconnect(report)
+        set_progress_sink(None)
+
+    if errors:
+        warn(f"Finished with {len(errors)} error{'s' if len(errors) > 1 else ''}.")
+        return 1
+
+    good("Finished.")
+
+    return 0
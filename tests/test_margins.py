@@ -0,0 +1,79 @@
+import pytest
+
+from OCR.margins import MarginFilter
+
+PAGE_WIDTH: int = 1700
+PAGE_HEIGHT: int = 2200
+LINE_HEIGHT: int = 30
+
+BODY: list[str] = [
+    "The harbour lay quiet in the November light,",
+    "and the lighthouse keeper wrote his log by hand.",
+    "Nothing of note was seen from the northern point."
+]
+
+
+def make_tsv(top: str | None, body: list[str], bottom: str | None) -> str:
+    """ tesseract's TSV for a page: an optional line at the top edge, body lines, an optional line at the bottom """
+
+    rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"]
+    rows.append(f"1\t1\t0\t0\t0\t0\t0\t0\t{PAGE_WIDTH}\t{PAGE_HEIGHT}\t-1\t")
+
+    lines = list()
+    if top is not None:
+        lines.append((1, 100, top))
+    lines.extend((2, 300 + i * 45, text) for i, text in enumerate(body))
+    if bottom is not None:
+        lines.append((3, 2100, bottom))
+
+    for line, (block, y, text) in enumerate(lines, start=1):
+        x = 200
+        for word in text.split():
+            width = 20 * len(word)
+            rows.append(f"5\t1\t{block}\t1\t{line}\t1\t{x}\t{y}\t{width}\t{LINE_HEIGHT}\t95\t{word}")
+            x += width + 15
+
+    return '\n'.join(rows)
+
+
+@pytest.mark.parametrize('folio', ["12", "[7]", "-3-", "xiv", "(ii)"])
+def test_removes_folio_at_bottom(folio: str) -> None:
+    text = MarginFilter().strip(make_tsv(None, BODY, folio))
+
+    assert folio not in text
+    assert BODY[0] in text
+
+
+@pytest.mark.parametrize('folio', ["12", "xiv"])
+def test_removes_folio_at_top(folio: str) -> None:
+    text = MarginFilter().strip(make_tsv(folio, BODY, None))
+
+    assert not text.startswith(folio)
+
+
+@pytest.mark.parametrize('word', ["mix", "Mi", "I", "1850", "0", "XIV"])
+def test_keeps_words_and_years_that_look_like_folios(word: str) -> None:
+    margins = MarginFilter()
+
+    assert word in margins.strip(make_tsv(word, BODY, None)).split()
+    assert word in margins.strip(make_tsv(None, BODY, word)).split()
+    assert margins.removed == 0
+
+
+def test_removes_repeated_header_with_folio() -> None:
+    margins = MarginFilter()
+
+    first = margins.strip(make_tsv("THE HARBOUR 12", BODY, None))
+    second = margins.strip(make_tsv("13 THE HARBOUR", BODY, None))
+
+    assert "THE HARBOUR" in first
+    assert "THE HARBOUR" not in second
+
+
+def test_keeps_roman_numeral_in_heading() -> None:
+    margins = MarginFilter()
+
+    margins.strip(make_tsv("CHAPTER I", BODY, None))
+    second = margins.strip(make_tsv("CHAPTER II", BODY, None))
+
+    assert "CHAPTER II" in second
@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+from preprocess.helper import BoundingBox
+from preprocess.template import CropTemplate
+
+PAGE_SHAPE: tuple[int, int] = (2200, 1700)  # US letter at 200 dpi
+REGION: tuple[int, int, int, int] = (160, 160, 1380, 1880)  # x, y, w, h
+
+
+def make_page() -> np.ndarray:
+    """ a page of text lines inside REGION, with a little scanner noise """
+
+    rng = np.random.default_rng(0)
+    page = np.full(PAGE_SHAPE, 245, np.uint8)
+
+    for row in range(40):
+        cv2.putText(page, "the harbour lighthouse in November", (180, 220 + row * 45),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, 20, 2)
+
+    noise = rng.normal(0, 4, PAGE_SHAPE)
+
+    return np.clip(page + noise, 0, 255).astype(np.uint8)
+
+
+def test_fits_page_with_text_inside_region() -> None:
+    template = CropTemplate(BoundingBox(REGION), PAGE_SHAPE)
+    assert template.fits(make_page())
+
+
+def test_fits_page_with_dust_in_margin() -> None:
+    page = make_page()
+
+    for x, y in ((40, 40), (1620, 900), (800, 2150)):
+        page[y:y + 3, x:x + 3] = 30
+
+    template = CropTemplate(BoundingBox(REGION), PAGE_SHAPE)
+    assert template.fits(page)
+
+
+def test_rejects_page_with_single_marginal_word() -> None:
+    page = make_page()
+    cv2.putText(page, "sic", (1580, 1000), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 20, 2)
+
+    template = CropTemplate(BoundingBox(REGION), PAGE_SHAPE)
+    assert not template.fits(page)
+
+
+def test_rejects_page_of_another_size() -> None:
+    page = cv2.resize(make_page(), (1275, 1650))
+
+    template = CropTemplate(BoundingBox(REGION), PAGE_SHAPE)
+    assert not template.fits(page)
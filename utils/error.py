@@ -1,11 +1,69 @@
-from PyQt5.QtCore import QObject, pyqtSignal
+import threading
+from typing import Callable
 
+from utils.status import warn
 
-class ErrorMessage(QObject):
-    error = pyqtSignal(str, str)
+ErrorCallback = Callable[[str, str], None]
+
+
+class ErrorSignal:
+    """ A minimal stand-in for a Qt signal: callbacks are called with (title, message), on the raising thread. """
+
+    def __init__(self) -> None:
+        self._callbacks: list[ErrorCallback] = list()
+        self._lock = threading.Lock()
+
+        return
+
+    def __bool__(self):
+        return bool(self._callbacks)
+
+    def connect(self, callback: ErrorCallback) -> None:
+        with self._lock:
+            self._callbacks.append(callback)
+
+        return
+
+    def disconnect(self, callback: ErrorCallback) -> None:
+        with self._lock:
+            self._callbacks.remove(callback)
+
+        return
+
+    def disconnect_all(self) -> None:
+        with self._lock:
+            self._callbacks.clear()
+
+        return
+
+    def emit(self, title: str, message: str) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            callback(title, message)
+
+        return
+
+
+class ErrorMessage:
+    """
+    Routes errors raised during processing to whoever is listening.
+
+    Kept free of Qt so processing can run headless: the GUI bridges error onto a Qt signal to show
+    a dialog on its own thread, and with no listener at all errors are printed to the console.
+    """
+
+    def __init__(self) -> None:
+        self.error = ErrorSignal()
+
+        return
 
     def raise_error(self, title: str, message: str):
-        self.error.emit(title, message)  # this is a static analysis problem, doesn't affect runtime
+        if self.error:
+            self.error.emit(title, message)
+        else:
+            warn(f"{title}: {message}")
 
 
 error_dispatcher = ErrorMessage()
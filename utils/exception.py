@@ -12,3 +12,19 @@ class FileTypeError(Exception):
     def __init__(self, filetype):
         self.message = f"Unexpected file type: '{filetype}'."
         super().__init__(self.message)
+
+
+class RenderError(Exception):
+    """Throw when poppler fails to render a page range"""
+
+    def __init__(self, first_page, last_page, reason):
+        self.message = f"Failed to render pages {first_page}-{last_page}: {reason}."
+        super().__init__(self.message)
+
+
+class JobCancelled(Exception):
+    """Throw when a running job is cancelled"""
+
+    def __init__(self):
+        self.message = "Job cancelled."
+        super().__init__(self.message)
@@ -1,16 +1,28 @@
+from __future__ import annotations
+
 import os
 from enum import Enum
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from OCR import OCR, ScanFlags
-from spellcheck import Spellchecker
-
-from preprocess.image_manipulation import ImageProcessing
-from preprocess.helper import ImgManipFlags
-from segment.pdf import Segment
 from utils.error import error_dispatcher
-from utils.status import good
-from utils.system import DirectoryContents, is_directory, is_filetype, read, write
+from utils.exception import RenderError
+from utils.manifest import JobManifest, PageStage
+from utils.pipeline import Pipeline, Stage
+from utils.scheduler import run_jobs, walk
+from utils.session import default_session, Session
+from utils.status import good, info
+from utils.system import is_directory, is_filetype, read, read_lazy, write
+
+# Stage modules are imported by the functions that use them. Each pulls in heavy dependencies
+# (OpenCV, numpy, poppler, tesseract, SymSpell), so a spellcheck-only run or opening the GUI
+# doesn't pay for the ones it never touches.
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from spellcheck import Spellchecker
+
+# slots taken by the single-worker stages of the pipelined .pdf path: render, preprocess and spellcheck
+PIPELINE_STAGE_SLOTS: int = 3
 
 
 class ProcessType(Enum):
@@ -31,6 +43,9 @@ def file_process_image(path: Path, spellcheck: bool = True) -> None:
         error_dispatcher.raise_error("File not found", f"Warning: file {path.name} not found.")
         return
 
+    from preprocess.helper import ImgManipFlags
+    from preprocess.image_manipulation import ImageProcessing
+
     # with ImageProcessing([path], ImgManipFlags.ContourDetection) as img:
     with ImageProcessing([path], ImgManipFlags.NoFlags) as img:
         img.save_image()
@@ -56,122 +71,403 @@ def file_process_image(path: Path, spellcheck: bool = True) -> None:
     return
 
 
-def file_process_text(path: Path) -> None:
-    text: list[str]
-    spellchecker: Spellchecker
+def file_process_text(path: Path, session: Session = default_session) -> None:
+    check: Spellchecker
     document: Path
 
     if not os.path.exists(path):
         error_dispatcher.raise_error("File not found", f"Warning: file {path.name} not found.")
         return
 
-    text = read(path, True)
-    with Spellchecker() as check:
-        if not check.loaded:
-            error_dispatcher.raise_error(
-                "No dictionaries loaded!",
-                "No dictionaries have been loaded.\nUse the 'Dictionary' tab to load dictionaries."
-            )
-        else:
-            text = check.spellcheck_batch(text)
-
     document = Path(path.parent, f"{path.stem}_spellchecked.txt")
-    write(text, document, 'w')
+    check = session.spellchecker
+
+    if not check.loaded:
+        error_dispatcher.raise_error(
+            "No dictionaries loaded!",
+            "No dictionaries have been loaded.\nUse the 'Dictionary' tab to load dictionaries."
+        )
+        write(read(path), document, 'w')
+    else:
+        # stream: memory stays flat and everything checked so far is on disk if the run dies
+        write('', document, 'w')
+        with session.resources.acquire(session.worker_count) as slots:
+            for checked in check.spellcheck_stream(read_lazy(path), slots.count):
+                write(checked, document, 'a')
+                session.check_cancelled()
+
     good(f"Text saved as '{document.name}'.")
 
     return
 
 
-def file_process_document(path: Path, scan: bool = True, spellcheck: bool = True) -> None:
-    images: DirectoryContents
-    texts: list[str]
-    doc: Path
-    document: Path
+def file_process_document(
+        path: Path, scan: bool = True, spellcheck: bool = True, session: Session = default_session
+) -> None:
+    """
+    Render, preprocess, OCR and spellcheck a .pdf, checkpointing every page in a job manifest.
+
+    Re-running a job that died part way picks up from the pages that were not finished.
+    """
+
+    images: dict[int, Path]
+    pages: list[int]
+    pending: list[int]
 
     if not os.path.exists(path):
         error_dispatcher.raise_error("File not found", f"Warning: file {path.name} not found.")
         return
 
-    with Segment(path) as pdf:
-        images = pdf.get_result()
-
-    with ImageProcessing(images, ImgManipFlags.CropRunningHeader) as img:
-        img.process()
+    if scan and session.in_memory:
+        file_process_document_pipelined(path, spellcheck, session)
+        return
 
-    if scan:
-        with OCR(images, ScanFlags.SplitPage | ScanFlags.FixHyphenation | ScanFlags.FixNewlines) as ocr:
-            texts = ocr.get_text()
+    from OCR import MarginFilter, OCR, ScanFlags
+    from preprocess.helper import ImgManipFlags
+    from preprocess.image_manipulation import ImageProcessing
+    from segment.page_format import PageFormat
+    from segment.pdf import Segment
+    from segment.render import page_number
+
+    with open_manifest(path, session) as manifest:
+        try:
+            pdf = Segment(
+                path,
+                manifest=manifest,
+                resources=session.resources,
+                page_format=PageFormat(session.page_format),
+                render=session.render_options,
+                cancelled=session.cancelled
+            )
+        except RenderError as e:
+            # pages rendered so far are in the manifest, so a re-run picks up from the failed ones
+            error_dispatcher.raise_error("Render Error", f"{e}")
+            return
+
+        with pdf:
+            images = {page_number(image): image for image in pdf.get_result()}
+
+        pages = list(range(1, pdf.page_count + 1))
+        manifest.page_count = pdf.page_count
+        session.check_cancelled()
+
+        def preprocessed(image: Path) -> None:
+            manifest.mark(page_number(image), PageStage.PREPROCESSED, flush=True)
+            session.check_cancelled()
+
+        def scanned(i: int, text: str) -> None:
+            manifest.write_text(pending[i], PageStage.SCANNED, text)
+            session.check_cancelled()
+
+        # cropping rewrites the image, so a page must never be preprocessed twice
+        pending = [
+            page for page in manifest.pending(PageStage.PREPROCESSED, manifest.pending(PageStage.SCANNED, pages))
+            if page in images
+        ]
+
+        if pending:
+            with ImageProcessing([images[page] for page in pending], ImgManipFlags.CropTemplate) as img:
+                img.process(on_image=preprocessed)
+
+        if not scan:
+            good(f"PDF processed, files saved in '{path.stem}'.")
+            return
+
+        pending = [page for page in manifest.pending(PageStage.SCANNED, pages) if page in images]
+
+        if pending:
+            with session.resources.acquire(session.worker_count) as slots:
+                OCR(
+                    [images[page] for page in pending],
+                    ScanFlags.NoFlags,
+                    psm=session.psm,
+                    worker_count=slots.count,
+                    dpi=pdf.dpi,
+                    # a pool must fork before tesseract (and its OpenMP runtime) is loaded here
+                    backend=session.ocr_backend if slots.count == 1 else None,
+                    cache=session.scan_cache,
+                    on_text=scanned,
+                    margins=MarginFilter() if session.strip_margins else None
+                )
+
+        check = loaded_spellchecker(session) if spellcheck else None
+
+        if check:
+            manifest.use_dictionaries(check.fingerprint)
+            spellcheck_pages(check, manifest, manifest.completed(PageStage.SCANNED, pages), session)
+
+        write_document(path, manifest, pages, spellchecked=check is not None)
 
-        document = Path(path.parent, path.stem, f"{path.stem}.txt")
-        write('\n'.join(texts), document, 'w')
+    return
 
-        if spellcheck:
-            with Spellchecker() as check:
-                if not check.loaded:
-                    error_dispatcher.raise_error(
-                        "No dictionaries loaded!",
-                        "No dictionaries have been loaded.\nUse the 'Dictionary' tab to load dictionaries."
-                    )
-                else:
-                    texts = check.spellcheck_batch(texts)
 
-        document = Path(path.parent, path.stem, f"{path.stem} spellchecked.txt")
-        write('\n'.join(texts), document, 'w')
-        good(f"Text saved as '{document.name}'.")
-    else:
-        good(f"PDF processed, files saved in '{path.stem}'.")
+def file_process_document_pipelined(path: Path, spellcheck: bool, session: Session) -> None:
+    """
+    Render, preprocess, OCR and spellcheck a .pdf as a pipeline of concurrent stages.
+
+    Decoded page buffers are passed between stages in memory through bounded queues, so page N can be
+    scanned while page N+1 renders and page N-1 is spellchecked. Nothing is written to disk but the
+    text, unless session.keep_intermediates is set. Rendering restarts from the first page not yet scanned.
+    """
+
+    check: Spellchecker | None
+    pages: list[int]
+    pending: list[int]
+
+    from OCR import cached_image_to_data, cached_image_to_string, get_backend, MarginFilter, OCR
+    from preprocess.helper import ImgManipFlags
+    from preprocess.image_manipulation import ImageProcessing
+    from segment.page_format import PageFormat
+    from segment.pdf import Segment
+
+    check = loaded_spellchecker(session) if spellcheck else None
+
+    with open_manifest(path, session) as manifest:
+        pdf = Segment(
+            path,
+            in_memory=True,
+            keep_intermediates=session.keep_intermediates,
+            manifest=manifest,
+            page_format=PageFormat(session.page_format),
+            render=session.render_options,
+            cancelled=session.cancelled
+        )
+        img = ImageProcessing([], ImgManipFlags.CropTemplate)
+        margins = MarginFilter() if session.strip_margins else None
+
+        pages = list(range(1, pdf.page_count + 1))
+        manifest.page_count = pdf.page_count
+
+        if check:
+            manifest.use_dictionaries(check.fingerprint)
+
+        def preprocess(page: tuple[int, ndarray]) -> tuple[int, ndarray | None]:
+            number, image = page
+            session.check_cancelled()
+
+            if manifest.done(number, PageStage.SCANNED):
+                return number, None
+
+            image = img.process_image(image)
+
+            if session.keep_intermediates:
+                pdf.save_array(image, f"{number}_processed")
+
+            return number, image
+
+        def scan(page: tuple[int, ndarray | None]) -> tuple[int, list[str]]:
+            number, image = page
+            session.check_cancelled()
+
+            if image is None:
+                text = manifest.read_text(number, PageStage.SCANNED)
+            elif margins:
+                data = cached_image_to_data(
+                    get_backend(), image, psm=session.psm, dpi=pdf.dpi, cache=session.scan_cache
+                )
+                text = margins.strip(data)
+                manifest.write_text(number, PageStage.SCANNED, text)
+            else:
+                text = cached_image_to_string(
+                    get_backend(), image, psm=session.psm, dpi=pdf.dpi, cache=session.scan_cache
+                )
+                manifest.write_text(number, PageStage.SCANNED, text)
+
+            return number, OCR.clean([text])
+
+        def correct(page: tuple[int, list[str]]) -> int:
+            number, paragraphs = page
+            session.check_cancelled()
+
+            if check and not manifest.done(number, PageStage.SPELLCHECKED):
+                checked = [check.check_paragraph(paragraph) for paragraph in paragraphs]
+                manifest.write_text(number, PageStage.SPELLCHECKED, '\n'.join(checked))
+
+            return number
+
+        pending = manifest.pending(PageStage.SCANNED, pages)
+
+        if pending:
+            info("Rendering, processing, scanning and spellchecking pages.")
+
+            with session.resources.acquire(session.worker_count) as slots:
+                # every stage runs at once: poppler, preprocessing and spellchecking take a slot each and
+                # tesseract workers get the rest, though never fewer than one
+                ocr_workers = max(1, slots.count - PIPELINE_STAGE_SLOTS)
+
+                try:
+                    Pipeline(
+                        pdf.iter_pages(pending[0]),
+                        [
+                            Stage('Preprocess', preprocess),
+                            Stage('OCR', scan, workers=ocr_workers),
+                            Stage('Spellcheck', correct)
+                        ],
+                        source_name='Render',
+                        item_count=pdf.page_count - pending[0] + 1,
+                        label='Pages'
+                    ).run()
+                except RenderError as e:
+                    error_dispatcher.raise_error("Render Error", f"{e}")
+                    return
+
+        if check:
+            # pages scanned before the resume point may still need checking
+            spellcheck_pages(check, manifest, manifest.completed(PageStage.SCANNED, pages), session)
+
+        write_document(path, manifest, pages, spellchecked=check is not None)
 
     return
 
 
-def file_handle_directory(path: Path, process: ProcessType = ProcessType.ALL) -> None:
-    items: list[str]
+def open_manifest(path: Path, session: Session) -> JobManifest:
+    settings = {
+        **session.render_options.settings(),
+        'psm': session.psm,
+        'strip_margins': session.strip_margins,
+        'page_format': session.page_format
+    }
+    return JobManifest(Path(path.parent, path.stem), path, settings, resume=session.resume)
+
+
+def loaded_spellchecker(session: Session) -> Spellchecker | None:
+    check = session.spellchecker
+
+    if not check.loaded:
+        error_dispatcher.raise_error(
+            "No dictionaries loaded!",
+            "No dictionaries have been loaded.\nUse the 'Dictionary' tab to load dictionaries."
+        )
+        return None
 
-    items = os.listdir(path)
+    return check
 
-    if not items:
-        error_dispatcher.raise_error("Empty directory", f"Warning: '{str(path.stem)}' has no contents.")
+
+def spellcheck_pages(check: Spellchecker, manifest: JobManifest, pages: list[int], session: Session) -> None:
+    """
+    Spellcheck the scanned text of each page not yet spellchecked, checkpointing pages as they complete.
+
+    Paragraphs from every pending page go through a single stream, so the worker pool is only started once.
+    """
+
+    paragraphs: dict[int, list[str]]
+    checked: list[str]
+
+    from OCR import OCR
+
+    pending = manifest.pending(PageStage.SPELLCHECKED, pages)
+
+    if not pending:
         return
 
-    for item in items:
-        item = path.joinpath(path, item)
+    paragraphs = {page: OCR.clean([manifest.read_text(page, PageStage.SCANNED)]) for page in pending}
+    checked = list()
+    remaining = iter(pending)
+    page = next(remaining)
+
+    stream = (paragraph for number in pending for paragraph in paragraphs[number])
 
-        if process == ProcessType.SCAN:
-            discern_type_scan(item)
-        elif process == ProcessType.SPELLCHECK:
-            discern_type_spellcheck(item)
-        else:
-            discern_type_all(item)
+    with session.resources.acquire(session.worker_count) as slots:
+        for chunk in check.spellcheck_stream(stream, slots.count):
+            checked.extend(chunk)
+
+            while page is not None and len(checked) >= len(paragraphs[page]):
+                count = len(paragraphs[page])
+                manifest.write_text(page, PageStage.SPELLCHECKED, '\n'.join(checked[:count]))
+                del checked[:count]
+                page = next(remaining, None)
+
+            session.check_cancelled()
+
+    return
+
+
+def write_document(path: Path, manifest: JobManifest, pages: list[int], spellchecked: bool) -> None:
+    """ assemble the per-page text kept by the manifest into the document's text files """
+
+    texts: list[str]
+    document: Path
+
+    from OCR import OCR
+
+    pages = manifest.completed(PageStage.SCANNED, pages)
+
+    texts = OCR.clean([manifest.read_text(page, PageStage.SCANNED) for page in pages])
+    document = Path(path.parent, path.stem, f"{path.stem}.txt")
+    write('\n'.join(texts), document, 'w')
+
+    if spellchecked:
+        texts = [
+            paragraph for page in pages for paragraph in manifest.read_text(page, PageStage.SPELLCHECKED).split('\n')
+        ]
+
+    document = Path(path.parent, path.stem, f"{path.stem} spellchecked.txt")
+    write('\n'.join(texts), document, 'w')
+    good(f"Text saved as '{document.name}'.")
+
+    return
+
+
+def file_handle_directory(
+        path: Path, process: ProcessType = ProcessType.ALL, session: Session = default_session
+) -> None:
+    """
+    Process every accepted file under a directory.
+
+    The whole tree is walked first, then files are scheduled largest first across session.worker_count cores.
+    """
+
+    handler, filetypes = {
+        ProcessType.ALL: (discern_type_all, ['.jpg', '.png', '.pdf', '.txt']),
+        ProcessType.SCAN: (discern_type_scan, ['.jpg', '.png', '.pdf']),
+        ProcessType.SPELLCHECK: (discern_type_spellcheck, ['.txt'])
+    }[process]
+
+    jobs, rejected, empty = walk(path, filetypes)
+
+    for directory in empty:
+        error_dispatcher.raise_error("Empty directory", f"Warning: '{str(directory.stem)}' has no contents.")
+
+    for item in rejected:
+        file_not_accepted(item)
+
+    if session.worker_count > 1 and len(jobs) > 1 and process != ProcessType.SCAN:
+        # compile the dictionaries once here, so worker processes load the compiled cache
+        loaded_spellchecker(session)
+
+    run_jobs(jobs, handler, session)
+
+    return
 
 
-def discern_type_all(path: Path) -> None:
+def discern_type_all(path: Path, session: Session = default_session) -> None:
     if is_filetype(path, ['.jpg', '.png']):
         file_process_image(path)
     elif is_filetype(path, ['.pdf']):
-        file_process_document(path)
+        file_process_document(path, session=session)
     elif is_filetype(path, ['.txt']):
-        file_process_text(path)
+        file_process_text(path, session)
     elif is_directory(path):
-        file_handle_directory(path)
+        file_handle_directory(path, session=session)
     else:
         file_not_accepted(path)
 
 
-def discern_type_scan(path: Path) -> None:
+def discern_type_scan(path: Path, session: Session = default_session) -> None:
     if is_filetype(path, ['.jpg', '.png']):
         file_process_image(path, spellcheck=False)
     elif is_filetype(path, ['.pdf']):
-        file_process_document(path, spellcheck=False)
+        file_process_document(path, spellcheck=False, session=session)
     elif is_directory(path):
-        file_handle_directory(path, ProcessType.SCAN)
+        file_handle_directory(path, ProcessType.SCAN, session)
     else:
         file_not_accepted(path)
 
 
-def discern_type_spellcheck(path: Path) -> None:
+def discern_type_spellcheck(path: Path, session: Session = default_session) -> None:
     if is_filetype(path, ['.txt']):
-        file_process_text(path)
+        file_process_text(path, session)
     elif is_directory(path):
-        file_handle_directory(path, ProcessType.SPELLCHECK)
+        file_handle_directory(path, ProcessType.SPELLCHECK, session)
     else:
         file_not_accepted(path)
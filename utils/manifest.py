@@ -0,0 +1,177 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Iterable
+
+from utils.status import info, warn
+from utils.system import read, write
+
+MANIFEST_VERSION: int = 1
+MANIFEST_NAME: str = 'manifest.json'
+TEXT_DIR: str = 'text'
+SAVE_INTERVAL: float = 1.0  # seconds between manifest writes while pages are being marked
+
+
+class PageStage(Enum):
+    # in processing order: redoing a stage for a page invalidates every stage after it
+    RENDERED = 'rendered'
+    PREPROCESSED = 'preprocessed'
+    SCANNED = 'scanned'
+    SPELLCHECKED = 'spellchecked'
+
+
+class JobManifest:
+    """
+    Per-page checkpoints for a .pdf job, kept as manifest.json in its work directory.
+
+    Records which pages have been rendered, preprocessed, scanned and spellchecked, and keeps each page's
+    text under text/, so a job that dies part way can resume from the first incomplete page.
+    A manifest is only resumed if the source file and settings are the ones it was written for.
+    """
+
+    def __init__(self, work_dir: Path, source: Path, settings: dict, resume: bool = True) -> None:
+        stat = os.stat(source)
+
+        self.path = Path(work_dir, MANIFEST_NAME)
+        self.text_dir = Path(work_dir, TEXT_DIR)
+        self.source = {'name': source.name, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        self.settings = settings
+        self.page_count = None
+        self.dictionaries = None
+        self.pages: dict[int, set[PageStage]] = dict()
+        self.resumable = False
+
+        self._lock = threading.Lock()
+        self._saved = 0.0
+
+        if resume:
+            self.load()
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            warn(e)
+            return
+
+        if (manifest.get('version') != MANIFEST_VERSION
+                or manifest.get('source') != self.source
+                or manifest.get('settings') != self.settings):
+            info(f"'{self.path.parent.name}' was made from a different file or settings, starting over.")
+            return
+
+        self.page_count = manifest['page_count']
+        self.dictionaries = manifest['dictionaries']
+        self.pages = {int(page): {PageStage(stage) for stage in stages} for page, stages in manifest['pages'].items()}
+        self.resumable = True
+
+        scanned = len(self.completed(PageStage.SCANNED, self.pages))
+        info(f"Resuming '{self.source['name']}': {scanned} of {self.page_count} pages already scanned.")
+
+        return
+
+    def save(self) -> None:
+        """ write the manifest atomically, so a crash mid-write leaves the previous one intact """
+
+        with self._lock:
+            manifest = {
+                'version': MANIFEST_VERSION,
+                'source': self.source,
+                'settings': self.settings,
+                'page_count': self.page_count,
+                'dictionaries': self.dictionaries,
+                'pages': {
+                    str(page): [stage.value for stage in PageStage if stage in stages]
+                    for page, stages in sorted(self.pages.items())
+                }
+            }
+            self._saved = time.monotonic()
+
+        try:
+            fd, temp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            warn(e)
+
+        return
+
+    def done(self, page: int, stage: PageStage) -> bool:
+        with self._lock:
+            return stage in self.pages.get(page, ())
+
+    def pending(self, stage: PageStage, pages: Iterable[int]) -> list[int]:
+        return [page for page in pages if not self.done(page, stage)]
+
+    def completed(self, stage: PageStage, pages: Iterable[int]) -> list[int]:
+        return [page for page in pages if self.done(page, stage)]
+
+    def mark(self, page: int, stage: PageStage, flush: bool = False) -> None:
+        """
+        Record page as having completed stage, and as needing every later stage redone.
+
+        Writes are batched to one per SAVE_INTERVAL; flush writes immediately, for stages that
+        change their input in place and so must never be repeated.
+        """
+
+        later = list(PageStage)[list(PageStage).index(stage) + 1:]
+
+        with self._lock:
+            stages = self.pages.setdefault(page, set())
+            stages.add(stage)
+            stages.difference_update(later)
+            due = flush or time.monotonic() - self._saved >= SAVE_INTERVAL
+
+        if due:
+            self.save()
+
+        return
+
+    def reset(self, stage: PageStage) -> None:
+        with self._lock:
+            for stages in self.pages.values():
+                stages.discard(stage)
+
+        return
+
+    def use_dictionaries(self, fingerprint: str | None) -> None:
+        """ spellchecked pages are only kept if they were checked against the same dictionaries """
+
+        if fingerprint != self.dictionaries:
+            self.reset(PageStage.SPELLCHECKED)
+            self.dictionaries = fingerprint
+
+        return
+
+    def text_path(self, page: int, stage: PageStage) -> Path:
+        return Path(self.text_dir, f"{page}_spellchecked.txt" if stage is PageStage.SPELLCHECKED else f"{page}.txt")
+
+    def write_text(self, page: int, stage: PageStage, text: str) -> None:
+        """ keep a page's text for stage, then mark the stage complete """
+
+        os.makedirs(self.text_dir, exist_ok=True)
+        write(text, self.text_path(page, stage), 'w')
+        self.mark(page, stage)
+
+        return
+
+    def read_text(self, page: int, stage: PageStage) -> str:
+        path = self.text_path(page, stage)
+        return read(path) if os.path.exists(path) else ''
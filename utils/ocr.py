@@ -3,9 +3,9 @@ import re
 from pathlib import Path
 from sys import exit
 
-import pytesseract
 from PIL import Image
 
+from OCR.backend import get_backend
 from utils.exception import EmptyDirectoryError
 from utils.status import warn
 from utils.system import DirectoryContents
@@ -31,10 +31,11 @@ def read_chars(directory: str) -> list[str]:
     dir_contents.sort()
     dir_contents.clear_except('.jpg')
     pages = list()
+    backend = get_backend()
 
     for page in dir_contents:
         page = Path(directory, page)
-        page_text = pytesseract.image_to_string(Image.open(page))
+        page_text = backend.image_to_string(Image.open(page))
         pages.append(page_text)
 
     return pages
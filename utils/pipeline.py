@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable
+
+from utils.status import info, progress
+
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name: str, queued: bool = True) -> None:
+        self.name = name
+        self.queued = queued
+        self.items = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self.total_depth = 0
+
+        self._lock = threading.Lock()
+
+        return
+
+    def record(self, elapsed: float, depth: int) -> None:
+        with self._lock:
+            self.items += 1
+            self.busy += elapsed
+            self.max_depth = max(self.max_depth, depth)
+            self.total_depth += depth
+
+        return
+
+    def report(self, wall: float) -> str:
+        per_item = self.busy / self.items if self.items else 0.0
+        throughput = self.items / wall if wall else 0.0
+        mean_depth = self.total_depth / self.items if self.items else 0.0
+
+        report = f"{self.name}: {self.items} items, {per_item:.3f} s/item, {throughput:.2f} items/s"
+
+        if self.queued:
+            report += f", input queue depth mean {mean_depth:.1f} max {self.max_depth}"
+
+        return report
+
+
+class Stage:
+    """ One step of a Pipeline: func is applied to every item by `workers` threads. """
+
+    def __init__(self, name: str, func: Callable[[object], object], workers: int = 1) -> None:
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.stats = StageStats(name)
+
+        return
+
+
+class Pipeline:
+    """
+    Run items from a source through a chain of stages concurrently.
+
+    Stages are joined by bounded queues, so a fast stage can run at most queue_size items ahead
+    of the next one: item N can be in one stage while item N+1 is in the stage before it.
+    Results come back in source order. Per-stage throughput and queue depth are kept in stats.
+    """
+
+    def __init__(
+            self,
+            source: Iterable,
+            stages: list[Stage],
+            source_name: str = 'Source',
+            queue_size: int = 4,
+            item_count: int | None = None,
+            label: str = 'Items'
+    ) -> None:
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.item_count = item_count
+        self.label = label
+
+        self.source_stats = StageStats(source_name, queued=False)
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        self.results = dict()
+        self.error = None
+        self.stop = threading.Event()
+
+        self._remaining = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+
+        return
+
+    @property
+    def stats(self) -> list[StageStats]:
+        return [self.source_stats] + [stage.stats for stage in self.stages]
+
+    def run(self) -> list:
+        threads = [threading.Thread(target=self._produce, daemon=True)]
+
+        for i, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=self._work, args=(i, stage), daemon=True) for _ in range(stage.workers)
+            )
+
+        start = time.time()
+
+        for thread in threads:
+            thread.start()
+
+        self._collect()
+
+        for thread in threads:
+            thread.join()
+
+        wall = time.time() - start
+
+        if self.error:
+            raise self.error
+
+        for stats in self.stats:
+            info(stats.report(wall))
+
+        return [self.results[i] for i in sorted(self.results)]
+
+    def _produce(self) -> None:
+        out = self.queues[0]
+        items = iter(self.source)
+
+        try:
+            index = 0
+            while not self.stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+
+                self.source_stats.record(time.perf_counter() - start, 0)
+                out.put((index, item))
+                index += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+
+            for _ in range(self.stages[0].workers if self.stages else 1):
+                out.put(_DONE)
+
+        return
+
+    def _work(self, i: int, stage: Stage) -> None:
+        inbox, out = self.queues[i], self.queues[i + 1]
+
+        while (entry := inbox.get()) is not _DONE:
+            if self.stop.is_set():
+                continue
+
+            depth = inbox.qsize()
+            index, item = entry
+            start = time.perf_counter()
+
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                self._fail(e)
+                continue
+
+            stage.stats.record(time.perf_counter() - start, depth)
+            out.put((index, result))
+
+        # the last worker of a stage to finish tells every worker downstream to stop
+        with self._lock:
+            self._remaining[i] -= 1
+            last = self._remaining[i] == 0
+
+        if last:
+            downstream = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+            for _ in range(downstream):
+                out.put(_DONE)
+
+        return
+
+    def _collect(self) -> None:
+        inbox = self.queues[-1]
+
+        while (entry := inbox.get()) is not _DONE:
+            index, result = entry
+            self.results[index] = result
+
+            if self.item_count:
+                progress(
+                    text=f"{self.label} completed: {len(self.results)} of {self.item_count}.",
+                    end='' if len(self.results) < self.item_count else '\r'
+                )
+
+        return
+
+    def _fail(self, error: Exception) -> None:
+        with self._lock:
+            if self.error is None:
+                self.error = error
+
+        self.stop.set()
+
+        return
@@ -0,0 +1,73 @@
+import os
+import threading
+
+
+class WorkerSlots:
+    """ A grant of worker slots from a ResourceManager, handed back when the with block ends. """
+
+    def __init__(self, manager: 'ResourceManager', count: int) -> None:
+        self.manager = manager
+        self.count = count
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def release(self) -> None:
+        if self.count:
+            self.manager.release(self.count)
+            self.count = 0
+
+        return
+
+
+class ResourceManager:
+    """
+    A fixed budget of worker slots, one per core, that every stage draws its threads and processes from.
+
+    A stage asks for as many slots as it could use and sizes its pool to what it is granted, so stages
+    running at the same time never have more runnable work between them than there are cores.
+    Every tesseract, poppler or spellcheck worker counts as one slot.
+    """
+
+    def __init__(self, cores: int | None = None) -> None:
+        self.cores = max(1, cores or os.cpu_count() or 1)
+
+        self._free = self.cores
+        self._condition = threading.Condition()
+
+        return
+
+    @property
+    def available(self) -> int:
+        with self._condition:
+            return self._free
+
+    def acquire(self, wanted: int, minimum: int = 1) -> WorkerSlots:
+        """
+        Take up to `wanted` slots, waiting until at least `minimum` are free.
+
+        Slots are not reentrant: a stage must not ask for more while it holds a grant,
+        or it can wait on itself once the budget runs out.
+        """
+
+        wanted = max(1, min(wanted, self.cores))
+        minimum = max(1, min(minimum, wanted))
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._free >= minimum)
+            count = min(wanted, self._free)
+            self._free -= count
+
+        return WorkerSlots(self, count)
+
+    def release(self, count: int) -> None:
+        with self._condition:
+            self._free = min(self.cores, self._free + count)
+            self._condition.notify_all()
+
+        return
@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable
+
+from utils.error import error_dispatcher
+from utils.exception import JobCancelled
+from utils.manifest import MANIFEST_NAME
+from utils.session import Session
+from utils.status import info, no_progress, progress, set_progress_sink, warn
+
+Handler = Callable[[Path, Session], None]
+
+_worker_session: Session | None = None
+
+
+class FileJob:
+    def __init__(self, path: Path, size: int) -> None:
+        self.path = path
+        self.size = size
+
+        return
+
+
+def walk(root: Path, filetypes: list[str]) -> tuple[list[FileJob], list[Path], list[Path]]:
+    """
+    Collect every file under root without processing anything, largest first.
+
+    Returns (jobs, files of other types, empty directories).
+    Work directories left by earlier .pdf jobs are skipped, as are directories already visited through a link.
+    """
+
+    jobs: list[FileJob]
+    rejected: list[Path]
+    empty: list[Path]
+    stack: list[Path]
+    visited: set[str]
+
+    jobs = list()
+    rejected = list()
+    empty = list()
+    stack = [root]
+    visited = set()
+
+    while stack:
+        directory = stack.pop()
+
+        real = os.path.realpath(directory)
+        if real in visited:
+            continue
+        visited.add(real)
+
+        try:
+            with os.scandir(directory) as scan:
+                entries = list(scan)
+        except OSError as e:
+            warn(e)
+            continue
+
+        if not entries:
+            empty.append(directory)
+            continue
+
+        if directory != root and any(entry.name == MANIFEST_NAME for entry in entries):
+            continue
+
+        for entry in entries:
+            path = Path(entry.path)
+
+            if entry.is_dir():
+                stack.append(path)
+            elif path.suffix in filetypes:
+                jobs.append(FileJob(path, entry.stat().st_size))
+            else:
+                rejected.append(path)
+
+    jobs.sort(key=lambda job: job.size, reverse=True)
+
+    return jobs, rejected, empty
+
+
+def run_jobs(jobs: list[FileJob], handler: Handler, session: Session) -> None:
+    """
+    Run handler over every job, sharing the session's worker slots between them.
+
+    Independent files are dispatched to a pool of up to worker_count processes, biggest first, so a long
+    document starts early while small files fill the remaining cores. When there are fewer files than cores,
+    the spare cores go to each file's own OCR and spellcheck pools. With one core or one file, jobs run here.
+    """
+
+    if not jobs:
+        return
+
+    if session.worker_count == 1 or len(jobs) == 1:
+        # each stage of the handler draws its own slots
+        for job in jobs:
+            session.check_cancelled()
+            handler(job.path, session)
+
+        return
+
+    # every worker process gets a session with its share of the slots held here
+    with session.resources.acquire(session.worker_count) as slots:
+        _run_pool(jobs, handler, session, slots.count)
+
+    session.check_cancelled()
+
+    return
+
+
+def _run_pool(jobs: list[FileJob], handler: Handler, session: Session, budget: int) -> None:
+    pool_size = min(budget, len(jobs))
+    settings = session.settings(worker_count=max(1, budget // pool_size), persist_clause_cache=False)
+    cancel = multiprocessing.Event()
+    finished = 0
+
+    info(f"Processing {len(jobs)} files on {pool_size} workers.")
+
+    with ProcessPoolExecutor(max_workers=pool_size, initializer=_init_worker, initargs=(settings, cancel)) as executor:
+        pending = {executor.submit(_run_job, handler, job.path): job for job in jobs}
+
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.pop(future)
+                finished += 1
+
+                if future.cancelled() or cancel.is_set():
+                    continue
+
+                errors = future.result()
+
+                for title, message in errors:
+                    error_dispatcher.raise_error(title, message)
+
+                progress(
+                    text=f"Files processed: {finished} of {len(jobs)}.",
+                    end='' if finished < len(jobs) else '\r'
+                )
+
+            if session.cancelled.is_set() and not cancel.is_set():
+                cancel.set()
+                for future in pending:
+                    future.cancel()
+
+    return
+
+
+def _init_worker(settings: dict, cancel) -> None:
+    global _worker_session
+
+    # files already run side by side; tesseract's OpenMP threads would oversubscribe the cores
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+    # listeners and the progress sink forked from the parent (the console reporter, the GUI's Qt signals) would
+    # report from the wrong process; _run_job hands errors back, and the parent counts files as they finish
+    error_dispatcher.error.disconnect_all()
+    set_progress_sink(no_progress)
+
+    _worker_session = Session(**settings)
+    _worker_session.cancelled = cancel
+
+
+def _run_job(handler: Handler, path: Path) -> list[tuple[str, str]]:
+    """ run one file in a worker process, handing back the errors it raised so the parent can report them """
+
+    errors = list()
+
+    def collect(title: str, message: str) -> None:
+        errors.append((title, message))
+
+    error_dispatcher.error.connect(collect)
+
+    # a cancelled job hands back what it has; the parent raises JobCancelled itself once the pool winds down
+    try:
+        handler(path, _worker_session)
+    except JobCancelled:
+        pass
+    except Exception as e:
+        errors.append(("Processing Error", f"Failed to process '{path.name}'.\n{e}"))
+    finally:
+        error_dispatcher.error.disconnect(collect)
+
+    return errors
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from utils.exception import JobCancelled
+from utils.resources import ResourceManager
+
+if TYPE_CHECKING:
+    from OCR import OCRBackend, ScanCache
+    from segment.render import RenderOptions
+    from spellcheck import Spellchecker
+
+
+class Session:
+    """
+    Warm resources shared by every file in a batch run.
+
+    The Spellchecker is loaded on first use and kept until the loaded dictionaries change;
+    the OCR engine keeps its language model loaded for the life of the session.
+    Neither SymSpell nor tesseract is imported until a file first needs it.
+    worker_count is the number of cores the session may use, all of them by default. Every stage draws its
+    workers from resources, a budget of worker_count slots, so stages never add up to more than that.
+    psm is the tesseract page segmentation mode documents are scanned with.
+    in_memory passes decoded pages from rendering to preprocessing to OCR without writing image files;
+    keep_intermediates writes them anyway, for debugging.
+    cache_scans keeps OCR results on disk, keyed by page pixels and settings, so re-running a document skips OCR.
+    resume picks a .pdf job up from its manifest rather than clearing the work directory and starting again.
+    strip_margins drops running headers and page numbers from scanned .pdf pages.
+    page_format is the suffix of the format .pdf page images are stored in, see segment.page_format.PageFormat.
+    dpi, colour and max_size are how .pdf pages are rasterised, see segment.render.RenderOptions; dpi None is
+    the default resolution.
+
+    Jobs are cancelled cooperatively: cancel() is safe to call from any thread, and the running job raises
+    JobCancelled at its next check_cancelled().
+    """
+
+    def __init__(
+            self,
+            persist_clause_cache: bool = False,
+            worker_count: int | None = None,
+            in_memory: bool = False,
+            keep_intermediates: bool = False,
+            cache_scans: bool = True,
+            resume: bool = True,
+            psm: int = 3,
+            strip_margins: bool = True,
+            page_format: str = 'jpg',
+            dpi: int | None = None,
+            colour: str = 'gray',
+            max_size: int | None = None
+    ) -> None:
+        self._lock = threading.Lock()
+        self._spellchecker = None
+
+        self.persist_clause_cache = persist_clause_cache
+        self.resources = ResourceManager(worker_count)
+        self.worker_count = self.resources.cores
+        self.in_memory = in_memory
+        self.keep_intermediates = keep_intermediates
+        self.cache_scans = cache_scans
+        self._scan_cache = None
+        self.resume = resume
+        self.psm = psm
+        self.strip_margins = strip_margins
+        self.page_format = page_format
+        self.dpi = dpi
+        self.colour = colour
+        self.max_size = max_size
+        self.cancelled = threading.Event()
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def spellchecker(self) -> Spellchecker:
+        with self._lock:
+            if self._spellchecker is None:
+                from spellcheck import Spellchecker
+                self._spellchecker = Spellchecker(persist_cache=self.persist_clause_cache)
+
+            return self._spellchecker
+
+    @property
+    def ocr_backend(self) -> OCRBackend:
+        from OCR import get_backend
+        return get_backend()
+
+    @property
+    def render_options(self) -> RenderOptions:
+        from segment.render import DEFAULT_DPI, RenderOptions
+        return RenderOptions(self.dpi or DEFAULT_DPI, self.colour, self.max_size)
+
+    @property
+    def scan_cache(self) -> ScanCache | None:
+        with self._lock:
+            if self._scan_cache is None and self.cache_scans:
+                from OCR import ScanCache
+                self._scan_cache = ScanCache()
+
+            return self._scan_cache
+
+    def settings(self, **overrides) -> dict:
+        """ the arguments for a Session configured like this one, e.g. in a worker process """
+
+        settings = {
+            'persist_clause_cache': self.persist_clause_cache,
+            'worker_count': self.worker_count,
+            'in_memory': self.in_memory,
+            'keep_intermediates': self.keep_intermediates,
+            'cache_scans': self.cache_scans,
+            'resume': self.resume,
+            'psm': self.psm,
+            'strip_margins': self.strip_margins,
+            'page_format': self.page_format,
+            'dpi': self.dpi,
+            'colour': self.colour,
+            'max_size': self.max_size
+        }
+        settings.update(overrides)
+
+        return settings
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+        return
+
+    def check_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise JobCancelled()
+
+        return
+
+    def invalidate(self) -> None:
+        """ drop the loaded Spellchecker, call when the set of loaded dictionaries changes """
+
+        with self._lock:
+            if self._spellchecker is not None:
+                self._spellchecker.__exit__(None, None, None)
+                self._spellchecker = None
+
+        return
+
+    def close(self) -> None:
+        self.invalidate()
+
+        return
+
+
+def limit_engine_threads(worker_count: int) -> None:
+    """
+    Keep tesseract to one OpenMP thread per engine when more than one core is shared: stages then run engines
+    side by side, and OpenMP's own threads would oversubscribe the cores.
+
+    OpenMP reads the limit once, when it starts, so call this at startup before any engine is created.
+    A limit already set in the environment is kept.
+    """
+
+    if worker_count > 1:
+        os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+    return
+
+
+default_session = Session()
@@ -1,3 +1,10 @@
+from typing import Callable
+
+ProgressSink = Callable[[str], None]
+
+_progress_sink: ProgressSink | None = None
+
+
 def good(text: object) -> None:
     print(f"[+] {text}")
 
@@ -11,4 +18,26 @@ def warn(text: object) -> None:
 
 
 def progress(text: object, end: str = '') -> None:
+    if _progress_sink:
+        _progress_sink(str(text))
+        return
+
     print(f"\r[i] {text} ", end=end, flush=True)
+
+
+def no_progress(text: str) -> None:
+    """ a progress sink that drops every update, for runs whose output is only read afterwards """
+
+    return
+
+
+def set_progress_sink(sink: ProgressSink | None) -> None:
+    """
+    Send progress() updates to sink instead of the console: a GUI's signal, or no_progress to drop them.
+    None restores the console.
+    """
+
+    global _progress_sink
+    _progress_sink = sink
+
+    return
@@ -3,6 +3,7 @@ import re
 import shutil
 from glob import glob
 from pathlib import Path, PosixPath
+from typing import Iterator
 
 from utils.error import error_dispatcher
 from utils.status import info, warn
@@ -94,12 +95,19 @@ def read(path: Path, multi: bool = False) -> list[str] | str:
         return f.readlines() if multi else f.read()
 
 
+def read_lazy(path: Path) -> Iterator[str]:
+    """ yield the lines of a file one at a time instead of reading it whole """
+
+    with open(path, 'r') as f:
+        yield from f
+
+
 def write(content: str | list[str], path: Path, mode: str) -> None:
     with open(path, mode) as f:
         f.write(content) if isinstance(content, str) else f.writelines(content)
 
 
-def create_new_directory(directory: Path) -> None:
+def create_new_directory(directory: Path, clear: bool = True) -> None:
     if not os.path.exists(directory):
         os.mkdir(directory)
 
@@ -107,7 +115,7 @@ def create_new_directory(directory: Path) -> None:
         error_dispatcher.raise_error("System Error", f"Failed to create directory '{str(directory.name)}'.")
         return
 
-    if os.listdir(directory):
+    if clear and os.listdir(directory):
         clear_dir(directory)
 
     return